@@ -1,11 +1,14 @@
 """
-Lightweight helpers for loading config.json and channels.json.
+Lightweight helpers for loading config.json and channels.json,
+plus a small per-user JSON cache under ~/.omnistream/.
 """
 
 import json
 import os
+import tempfile
 
 _ROOT = os.path.dirname(os.path.abspath(__file__))
+CACHE_DIR = os.path.join(os.path.expanduser('~'), '.omnistream')
 
 
 def _load_json(filename: str) -> dict:
@@ -48,5 +51,39 @@ def get_config() -> dict:
     return _load_json('config.json')
 
 
+def load_cache(name: str, default=None):
+    """
+    Return the JSON stored in ~/.omnistream/<name>.
+
+    Missing or corrupt cache files are treated as empty (``default``).
+    """
+    try:
+        with open(os.path.join(CACHE_DIR, name), 'r') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return default
+
+
+def save_cache(name: str, data) -> bool:
+    """
+    Atomically write ``data`` as JSON to ~/.omnistream/<name>.
+
+    Writes to a temp file in the same directory and os.replace()s it over
+    the target, so readers never see a half-written file.
+    """
+    tmp_path = None
+    try:
+        os.makedirs(CACHE_DIR, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=CACHE_DIR, prefix=f'.{name}.')
+        with os.fdopen(fd, 'w') as f:
+            json.dump(data, f)
+        os.replace(tmp_path, os.path.join(CACHE_DIR, name))
+        return True
+    except (OSError, TypeError, ValueError):
+        if tmp_path and os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        return False
+
+
 def _raise(exc):
     raise exc
@@ -6,6 +6,8 @@ Tracks all downloaded videos to prevent duplicates
 
 import sqlite3
 import os
+import threading
+import functools
 from datetime import datetime
 from typing import Optional, Dict, List, Tuple
 import logging
@@ -13,6 +15,15 @@ import logging
 logger = logging.getLogger(__name__)
 
 
+def _synchronized(method):
+    """Serialize calls that touch the shared sqlite connection"""
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        with self._lock:
+            return method(self, *args, **kwargs)
+    return wrapper
+
+
 class DownloadHistory:
     """SQLite-based download history tracker"""
 
@@ -20,10 +31,15 @@ class DownloadHistory:
         """Initialize database connection"""
         self.db_path = db_path
         # Persistent connection — avoids per-call open/close overhead.
-        # check_same_thread=False is safe here: all writes go through
-        # this singleton and the app is effectively single-threaded for DB ops.
+        # check_same_thread=False is safe here: all access goes through
+        # this singleton and is serialized by self._lock, since batch
+        # downloads share it across worker threads.
+        self._lock = threading.RLock()
         self._conn = sqlite3.connect(self.db_path, check_same_thread=False)
         self._conn.execute("PRAGMA journal_mode=WAL")  # non-blocking concurrent reads
+        # With WAL, NORMAL only syncs at checkpoints: each per-video commit
+        # skips its fsync, and the database stays consistent after a crash
+        self._conn.execute("PRAGMA synchronous=NORMAL")
         self._init_database()
 
     def _init_database(self):
@@ -63,6 +79,7 @@ class DownloadHistory:
             logger.error(f"Database initialization failed: {e}")
             raise
 
+    @_synchronized
     def is_downloaded(self, video_id: str) -> bool:
         """
         Check if video has been downloaded before
@@ -85,6 +102,7 @@ class DownloadHistory:
             logger.error(f"Error checking download history: {e}")
             return False
 
+    @_synchronized
     def add_to_history(self, video_info: Dict) -> bool:
         """
         Add downloaded video to history
@@ -124,6 +142,7 @@ class DownloadHistory:
             logger.error(f"Error adding to history: {e}")
             return False
 
+    @_synchronized
     def get_stats(self) -> Dict:
         """
         Get download statistics
@@ -169,6 +188,7 @@ class DownloadHistory:
                 'recent_7days': 0
             }
 
+    @_synchronized
     def get_recent(self, limit: int = 20) -> List[Tuple]:
         """
         Get recent downloads
@@ -193,6 +213,7 @@ class DownloadHistory:
             logger.error(f"Error getting recent downloads: {e}")
             return []
 
+    @_synchronized
     def clear_history(self) -> bool:
         """
         Clear all download history (use with caution)
@@ -214,10 +235,13 @@ class DownloadHistory:
 
 # Singleton instance
 _history_instance = None
+_history_lock = threading.Lock()
 
 def get_history() -> DownloadHistory:
     """Get or create singleton database instance"""
     global _history_instance
     if _history_instance is None:
-        _history_instance = DownloadHistory()
+        with _history_lock:
+            if _history_instance is None:
+                _history_instance = DownloadHistory()
     return _history_instance
@@ -5,18 +5,200 @@ Enables direct uploads to shared folders bypassing filesystem limitations
 
 import os
 import io
+import time
 import pickle
+import json
+import mimetypes
+import socket
+import threading
+import httplib2
 from typing import List, Optional, Dict
 from google.oauth2.credentials import Credentials
 from google.oauth2 import service_account
 from google_auth_oauthlib.flow import InstalledAppFlow
 from google.auth.transport.requests import Request
+from google_auth_httplib2 import AuthorizedHttp
 from googleapiclient.discovery import build
-from googleapiclient.http import MediaFileUpload, MediaIoBaseUpload
+from googleapiclient.http import MediaIoBaseUpload, build_http
 from googleapiclient.errors import HttpError
+from config_loader import load_cache, save_cache
+
+# Optional HTTP/2 transport (pip install "httpx[http2]")
+try:
+    import httpx
+    import h2  # noqa: F401 -- httpx needs it for http2=True
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
 
 SCOPES = ['https://www.googleapis.com/auth/drive.file']
 
+FOLDER_MIME_TYPE = 'application/vnd.google-apps.folder'
+# Constant tail of every folder search query
+_FOLDER_QUERY_SUFFIX = f" and mimeType='{FOLDER_MIME_TYPE}' and trashed=false"
+
+# Resumable uploads: chunk sizes must be a multiple of 256 KiB.
+# Override the starting size with the DRIVE_CHUNK_SIZE env var (bytes).
+CHUNK_ALIGN = 256 * 1024
+DEFAULT_CHUNK_SIZE = 8 * 1024 * 1024
+MAX_CHUNK_SIZE = 64 * 1024 * 1024
+# Adaptive chunking: grow after fast chunks, shrink after slow ones
+FAST_CHUNK_SECS = 10
+SLOW_CHUNK_SECS = 30
+# Below this size a single multipart POST beats opening a resumable session
+SIMPLE_UPLOAD_LIMIT = 20 * 1024 * 1024
+# Below this size the resumable body is streamed in one request (chunksize=-1);
+# larger files fall back to fixed-size chunks so a failure loses less progress
+STREAM_UPLOAD_LIMIT = 256 * 1024 * 1024
+UPLOAD_RETRIES = 3
+# Read buffer for upload file handles
+UPLOAD_BUFFER_SIZE = 1024 * 1024
+RETRYABLE_STATUSES = (429, 500, 502, 503, 504)
+# Socket timeout for Drive calls; generous so a 64 MiB chunk on a slow link fits
+HTTP_TIMEOUT = 300
+# storageQuota from about().get() is reused for this long (process-wide);
+# uploads at least QUOTA_REFRESH_BYTES big drop it so usage reads fresh
+QUOTA_TTL = 60.0
+QUOTA_REFRESH_BYTES = 100 * 1024 * 1024
+_QUOTA_CACHE = {"t": 0.0, "v": None}
+# Last chunk size the adaptive loop settled on, reused as the next run's start
+_TUNING_CACHE = 'drive_upload.json'
+# Drive rejects batch requests with more than 100 calls
+BATCH_LIMIT = 100
+# Resolved (parent, folder names) -> folder ID, shared across runs
+_FOLDER_CACHE = 'folder_cache.json'
+
+
+def _align_chunk_size(size: int) -> int:
+    """Clamp a chunk size to [256 KiB, 64 MiB] and round down to a 256 KiB multiple"""
+    size = min(max(size, CHUNK_ALIGN), MAX_CHUNK_SIZE)
+    return size - size % CHUNK_ALIGN
+
+
+def _configured_chunk_size() -> int:
+    """
+    Starting chunk size for large uploads.
+
+    Priority: DRIVE_CHUNK_SIZE env var > size learned on the previous run > default.
+    """
+    size = None
+    if os.getenv('DRIVE_CHUNK_SIZE'):
+        try:
+            size = int(os.getenv('DRIVE_CHUNK_SIZE'))
+        except ValueError:
+            pass
+    if size is None:
+        size = (load_cache(_TUNING_CACHE) or {}).get('chunk_size', DEFAULT_CHUNK_SIZE)
+    return _align_chunk_size(size)
+
+
+class _Http2Transport:
+    """
+    httplib2.Http stand-in backed by an HTTP/2 httpx.Client.
+
+    googleapiclient and google-auth-httplib2 only call request() and
+    close(), and read status/headers off an httplib2.Response, so that is
+    all this implements. The client is thread-safe, so one instance lets
+    every worker thread multiplex its Drive calls over a single connection.
+    Redirects are returned as-is, as httplib2 does for googleapiclient:
+    resumable uploads answer 308 and googleapiclient handles it itself.
+    """
+
+    def __init__(self, timeout: float):
+        self.timeout = timeout
+        self._client = httpx.Client(http2=True, timeout=timeout, follow_redirects=False)
+
+    def request(self, uri, method='GET', body=None, headers=None, redirections=5,
+                connection_type=None, **kwargs):
+        if hasattr(body, 'read'):
+            # Resumable upload bodies arrive as file-like slices; stream them
+            stream = body
+            body = iter(lambda: stream.read(UPLOAD_BUFFER_SIZE), b'')
+        try:
+            r = self._client.request(method, uri, content=body, headers=headers)
+        # Re-raise as the socket errors googleapiclient's retry loop expects
+        except httpx.TimeoutException as e:
+            raise socket.timeout(str(e)) from e
+        except httpx.TransportError as e:
+            raise ConnectionError(str(e)) from e
+        resp = httplib2.Response({**r.headers, 'status': r.status_code})
+        resp.reason = r.reason_phrase
+        return resp, r.content
+
+    def close(self):
+        self._client.close()
+
+
+_http2_transport = None
+_http2_lock = threading.Lock()
+
+
+def _use_http2() -> bool:
+    """HTTP/2 is opt-in: DRIVE_HTTP2=1 with httpx[http2] installed"""
+    return HTTP2_AVAILABLE and os.getenv('DRIVE_HTTP2', '0') == '1'
+
+
+def _build_service(creds):
+    """
+    Build a Drive service on a long-lived authorized HTTP transport.
+
+    With httpx[http2] installed, all threads share one HTTP/2 connection
+    and multiplex their requests over it. Otherwise each service gets its
+    own httplib2.Http, which keeps one keep-alive connection per host, so
+    only the first request pays the TLS handshake. Discovery caching is
+    disabled since the v3 document ships with the client library.
+    """
+    global _http2_transport
+    if _use_http2():
+        with _http2_lock:
+            if _http2_transport is None:
+                _http2_transport = _Http2Transport(HTTP_TIMEOUT)
+        http = _http2_transport
+    else:
+        # build_http() keeps 308 out of httplib2's redirect codes; resumable
+        # uploads use 308 for "resume incomplete", not a redirect
+        http = build_http()
+        http.timeout = HTTP_TIMEOUT
+    return build('drive', 'v3', http=AuthorizedHttp(creds, http=http), cache_discovery=False)
+
+
+def _channel_folder_names(channel_info: dict) -> List[str]:
+    """Candidate folder names for a channel, most specific first (handle, name, id)"""
+    return [channel_info[k] for k in ('handle', 'name', 'id') if channel_info.get(k)]
+
+
+def _folder_query(folder_names: List[str], parent_id: str) -> str:
+    """files().list query matching a folder under parent_id named any of folder_names"""
+    # Drive query strings escape backslashes and single quotes with a backslash
+    escaped = [n.replace('\\', '\\\\').replace("'", "\\'") for n in folder_names]
+    name_clause = ' or '.join(f"name = '{n}'" for n in escaped)
+    return f"({name_clause}) and '{parent_id}' in parents" + _FOLDER_QUERY_SUFFIX
+
+
+def adapt_chunk_size(media, elapsed: float) -> int:
+    """
+    Double or halve a resumable upload's chunk size after each chunk.
+
+    Chunks finishing in under 10s double (fast links stop paying a round-trip
+    per small chunk); chunks taking over 30s halve (slow links don't stall on
+    huge chunks).
+
+    Args:
+        media: MediaUpload driving the request
+        elapsed: Seconds the last next_chunk() call took
+
+    Returns:
+        The chunk size used for the next chunk
+    """
+    size = media.chunksize()
+    if elapsed < FAST_CHUNK_SECS:
+        size = _align_chunk_size(size * 2)
+    elif elapsed > SLOW_CHUNK_SECS:
+        size = _align_chunk_size(size // 2)
+    # No public setter; next_chunk() re-reads _chunksize on every call
+    media._chunksize = size
+    return size
+
 
 class GoogleDriveAPI:
     """Google Drive API client for file uploads"""
@@ -25,10 +207,27 @@ class GoogleDriveAPI:
         self.credentials_file = credentials_file
         self.token_file = token_file
         self.service_account_file = service_account_file
-        self.service = None
+        self.creds = None
         self.auth_mode = None  # 'service_account' or 'oauth'
+        # httplib2 is not thread-safe, so each thread gets its own service
+        self._local = threading.local()
+        # Folder IDs never change once created, so lookups are cached in
+        # memory and on disk; the lock also stops concurrent workers from
+        # creating the same channel folder twice.
+        self._folder_cache = load_cache(_FOLDER_CACHE, {})
+        if not isinstance(self._folder_cache, dict):
+            self._folder_cache = {}
+        self._folder_lock = threading.RLock()
         self.authenticate()
     
+    @property
+    def service(self):
+        """Drive service for the calling thread (built on first use)"""
+        service = getattr(self._local, 'service', None)
+        if service is None and self.creds is not None:
+            service = self._local.service = _build_service(self.creds)
+        return service
+    
     def authenticate(self):
         """
         Authenticate with Google Drive API
@@ -75,8 +274,9 @@ class GoogleDriveAPI:
             self.auth_mode = 'oauth'
             print("👤 Google Drive: User Mode (OAuth)")
         
-        # Build Drive service
-        self.service = build('drive', 'v3', credentials=creds)
+        # Build Drive service (other threads build their own lazily)
+        self.creds = creds
+        self._local.service = _build_service(creds)
         print("✓ Google Drive API initialized")
     
     def find_folder_by_path(self, path_parts: List[str]) -> Optional[str]:
@@ -93,18 +293,12 @@ class GoogleDriveAPI:
         
         for folder_name in path_parts:
             # Search for folder in current parent
-            query = (
-                f"name='{folder_name}' and "
-                f"'{current_folder_id}' in parents and "
-                f"mimeType='application/vnd.google-apps.folder' and "
-                f"trashed=false"
-            )
-            
             try:
                 results = self.service.files().list(
-                    q=query,
+                    q=_folder_query([folder_name], current_folder_id),
                     spaces='drive',
-                    fields='files(id, name)',
+                    fields='files(id)',
+                    pageSize=1,
                     includeItemsFromAllDrives=True,
                     supportsAllDrives=True
                 ).execute()
@@ -115,7 +309,7 @@ class GoogleDriveAPI:
                     # Folder doesn't exist, create it
                     folder_metadata = {
                         'name': folder_name,
-                        'mimeType': 'application/vnd.google-apps.folder',
+                        'mimeType': FOLDER_MIME_TYPE,
                         'parents': [current_folder_id]
                     }
                     folder = self.service.files().create(
@@ -158,21 +352,27 @@ class GoogleDriveAPI:
         if not folder_names or not parent_id:
             return None
 
-        # Build OR query for any matching name
-        escaped = [n.replace("'", "\\'") for n in folder_names]
-        name_clause = ' or '.join(f"name = '{n}'" for n in escaped)
-        query = (
-            f"({name_clause}) and "
-            f"'{parent_id}' in parents and "
-            f"mimeType='application/vnd.google-apps.folder' and "
-            f"trashed=false"
-        )
+        key = json.dumps([parent_id, folder_names])
+        folder_id = self._folder_cache.get(key)
+        if folder_id:
+            return folder_id
+
+        with self._folder_lock:
+            # Another worker may have resolved it while we waited
+            folder_id = self._folder_cache.get(key)
+            if not folder_id:
+                folder_id = self._lookup_or_create_folder(folder_names, parent_id)
+                if folder_id:
+                    self._remember_folder(key, folder_id)
+            return folder_id
 
+    def _lookup_or_create_folder(self, folder_names: List[str], parent_id: str) -> Optional[str]:
+        """Query Drive for a folder matching any of folder_names, creating it if absent"""
         try:
             results = self.service.files().list(
-                q=query,
+                q=_folder_query(folder_names, parent_id),
                 spaces='drive',
-                fields='files(id, name)',
+                fields='files(id)',
                 pageSize=1,
                 includeItemsFromAllDrives=True,
                 supportsAllDrives=True
@@ -186,7 +386,7 @@ class GoogleDriveAPI:
             primary_name = folder_names[0]
             folder_metadata = {
                 'name': primary_name,
-                'mimeType': 'application/vnd.google-apps.folder',
+                'mimeType': FOLDER_MIME_TYPE,
                 'parents': [parent_id]
             }
             folder = self.service.files().create(
@@ -201,6 +401,145 @@ class GoogleDriveAPI:
             print(f"[ERROR] Failed to find/create folder: {e}")
             return None
 
+    def find_or_create_folders(self, name_lists: List[List[str]], parent_id: str) -> List[Optional[str]]:
+        """
+        Resolve many folders under one parent in as few round-trips as possible.
+
+        Uncached lookups go out as a single batch request (multipart/mixed),
+        and any folders still missing are created in a second batch, instead
+        of 1-2 sequential calls per folder.
+
+        Args:
+            name_lists: One list of candidate names per folder (see find_or_create_folder)
+            parent_id: Parent folder ID
+
+        Returns:
+            Folder IDs aligned with name_lists (None where resolution failed)
+        """
+        name_lists = [[n for n in names if n] for names in name_lists]
+        keys = [json.dumps([parent_id, names]) for names in name_lists]
+
+        with self._folder_lock:
+            pending = {}
+            for key, names in zip(keys, name_lists):
+                if names and key not in self._folder_cache:
+                    pending[key] = names
+
+            found = self._batch_execute({
+                key: self.service.files().list(
+                    q=_folder_query(names, parent_id),
+                    spaces='drive',
+                    fields='files(id)',
+                    pageSize=1,
+                    includeItemsFromAllDrives=True,
+                    supportsAllDrives=True
+                )
+                for key, names in pending.items()
+            })
+            missing = {}
+            for key, names in pending.items():
+                files = (found.get(key) or {}).get('files')
+                if files:
+                    self._folder_cache[key] = files[0]['id']
+                elif key in found:
+                    missing[key] = names
+
+            created = self._batch_execute({
+                key: self.service.files().create(
+                    body={
+                        'name': names[0],
+                        'mimeType': FOLDER_MIME_TYPE,
+                        'parents': [parent_id]
+                    },
+                    fields='id',
+                    supportsAllDrives=True
+                )
+                for key, names in missing.items()
+            })
+            for key, folder in created.items():
+                print(f"✓ Created folder: {missing[key][0]}")
+                self._folder_cache[key] = folder['id']
+
+            if pending:
+                save_cache(_FOLDER_CACHE, self._folder_cache)
+            return [self._folder_cache.get(key) for key in keys]
+
+    def _batch_execute(self, requests: Dict[str, object]) -> Dict[str, dict]:
+        """
+        Run requests through Drive batch calls, at most BATCH_LIMIT per call.
+
+        Returns:
+            {request key: response} for the requests that succeeded
+        """
+        responses = {}
+
+        def callback(request_id, response, exception):
+            if exception is not None:
+                print(f"[ERROR] Batch request failed: {exception}")
+            else:
+                responses[request_id] = response
+
+        items = list(requests.items())
+        for start in range(0, len(items), BATCH_LIMIT):
+            batch = self.service.new_batch_http_request(callback=callback)
+            for key, request in items[start:start + BATCH_LIMIT]:
+                batch.add(request, request_id=key)
+            try:
+                batch.execute()
+            except HttpError as e:
+                print(f"[ERROR] Batch call failed: {e}")
+        return responses
+
+    def _remember_folder(self, key: str, folder_id: str):
+        """Add a resolved folder to the cache and persist it"""
+        with self._folder_lock:
+            self._folder_cache[key] = folder_id
+            save_cache(_FOLDER_CACHE, self._folder_cache)
+
+    def forget_folder(self, folder_id: str):
+        """
+        Drop every cache entry pointing at folder_id.
+
+        Called when Drive reports the folder missing (deleted or trashed)
+        so the next lookup re-resolves it.
+        """
+        with self._folder_lock:
+            stale = [k for k, v in self._folder_cache.items() if v == folder_id]
+            for k in stale:
+                del self._folder_cache[k]
+            if stale:
+                save_cache(_FOLDER_CACHE, self._folder_cache)
+
+    def resolve_destination(self, channel_info: dict, base_folder_id: str) -> Optional[str]:
+        """
+        Resolve (and create if needed) the channel folder under base_folder_id.
+
+        Callers that upload several files for one channel can resolve it
+        once and pass the ID straight to upload_file().
+
+        Returns:
+            Folder ID or None on error
+        """
+        return self.find_or_create_folder(_channel_folder_names(channel_info), base_folder_id)
+
+    def get_storage_quota(self, ttl: float = QUOTA_TTL) -> Dict[str, str]:
+        """
+        Drive storage quota, reused across callers for up to `ttl` seconds
+        
+        Args:
+            ttl: Maximum age in seconds of a cached result
+        
+        Returns:
+            storageQuota dict ('limit' is absent on unlimited accounts)
+        """
+        now = time.monotonic()
+        if _QUOTA_CACHE["v"] is not None and now - _QUOTA_CACHE["t"] < ttl:
+            return _QUOTA_CACHE["v"]
+        about = self.service.about().get(fields='storageQuota(limit,usage)').execute()
+        quota = about.get('storageQuota', {})
+        _QUOTA_CACHE["t"], _QUOTA_CACHE["v"] = now, quota
+        return quota
+    
     def upload_with_channel(self, file_path: str, channel_info: dict, base_folder_id: str, platform: str = 'YouTube') -> Optional[Dict]:
         """
         Upload a file using smart channel-folder creation.
@@ -218,15 +557,9 @@ class GoogleDriveAPI:
             File metadata dict or None on error
         """
         try:
-            potential_names = []
-            if channel_info.get('handle'):
-                potential_names.append(channel_info['handle'])
-            if channel_info.get('name'):
-                potential_names.append(channel_info['name'])
-            if channel_info.get('id'):
-                potential_names.append(channel_info['id'])
-
-            channel_folder_id = self.find_or_create_folder(potential_names, base_folder_id)
+            potential_names = _channel_folder_names(channel_info)
+
+            channel_folder_id = self.resolve_destination(channel_info, base_folder_id)
             if not channel_folder_id:
                 return None
 
@@ -254,12 +587,13 @@ class GoogleDriveAPI:
         if filename is None:
             filename = os.path.basename(file_path)
         
-        # Verify file exists
-        if not os.path.exists(file_path):
+        # Verify file exists (one stat gives existence and size)
+        try:
+            file_size = os.stat(file_path).st_size
+        except FileNotFoundError:
             print(f"[ERROR] File not found: {file_path}")
             return None
         
-        file_size = os.path.getsize(file_path)
         print(f"[INFO] Uploading file: {filename} ({file_size} bytes)")
         print(f"[INFO] Target folder ID: {folder_id}")
         
@@ -268,24 +602,45 @@ class GoogleDriveAPI:
             'parents': [folder_id]
         }
         
+        mimetype = mimetypes.guess_type(file_path)[0] or 'application/octet-stream'
+        
         try:
-            media = MediaFileUpload(
-                file_path,
-                resumable=True
-            )
+            # Small files go up in one multipart request, medium files stream
+            # through a resumable session in a single PUT, and only large files
+            # are split into chunks.
+            if file_size < SIMPLE_UPLOAD_LIMIT:
+                chunksize, resumable = DEFAULT_CHUNK_SIZE, False
+            elif file_size < STREAM_UPLOAD_LIMIT:
+                chunksize, resumable = -1, True
+            else:
+                chunksize, resumable = _configured_chunk_size(), True
             
-            print(f"[INFO] Starting upload to Drive...")
-            file = self.service.files().create(
-                body=file_metadata,
-                media_body=media,
-                fields='id, name, webViewLink',
-                supportsAllDrives=True
-            ).execute()
+            # Own the file handle so it is closed as soon as the upload ends
+            # (MediaFileUpload leaves that to garbage collection). Resumable
+            # bodies are read from it one chunk at a time.
+            with open(file_path, 'rb', buffering=UPLOAD_BUFFER_SIZE) as f:
+                media = MediaIoBaseUpload(f, mimetype=mimetype, chunksize=chunksize, resumable=resumable)
+                
+                print(f"[INFO] Starting upload to Drive...")
+                request = self.service.files().create(
+                    body=file_metadata,
+                    media_body=media,
+                    fields='id, name, webViewLink',
+                    supportsAllDrives=True
+                )
+                if resumable:
+                    file = self._execute_resumable(request)
+                else:
+                    file = request.execute(num_retries=UPLOAD_RETRIES)
             
+            if file_size >= QUOTA_REFRESH_BYTES:
+                _QUOTA_CACHE["v"] = None
             print(f"[SUCCESS] Upload complete: {file.get('name')}")
             return file
         
         except HttpError as e:
+            if e.resp.status == 404:
+                self.forget_folder(folder_id)
             print(f"[ERROR] HTTP Error during upload: {e}")
             print(f"[ERROR] Error details: {e.error_details if hasattr(e, 'error_details') else 'No details'}")
             return None
@@ -295,6 +650,38 @@ class GoogleDriveAPI:
             traceback.print_exc()
             return None
     
+    def _execute_resumable(self, request) -> Dict:
+        """
+        Drive a resumable upload to completion.
+
+        The session URI lives on the request object, so after a transient
+        failure calling next_chunk() again resumes from the last byte the
+        server acknowledged instead of restarting the upload. Chunked
+        uploads adapt their chunk size to the measured throughput.
+        """
+        media = request.resumable
+        adaptive = media.chunksize() > 0
+        response = None
+        failures = 0
+        while response is None:
+            try:
+                started = time.monotonic()
+                _, response = request.next_chunk(num_retries=UPLOAD_RETRIES)
+                if adaptive and response is None:
+                    adapt_chunk_size(media, time.monotonic() - started)
+            except (HttpError, OSError) as e:
+                if isinstance(e, HttpError) and e.resp.status not in RETRYABLE_STATUSES:
+                    raise
+                failures += 1
+                if failures > UPLOAD_RETRIES:
+                    raise
+                delay = 2 ** failures
+                print(f"[WARNING] Upload interrupted ({e}), resuming in {delay}s...")
+                time.sleep(delay)
+        if adaptive:
+            save_cache(_TUNING_CACHE, {'chunk_size': media.chunksize()})
+        return response
+
     def upload_from_bytes(self, file_bytes: bytes, filename: str, folder_id: str, mimetype: str = 'video/mp4') -> Optional[Dict]:
         """
         Upload file directly from bytes (no local file needed)
@@ -327,8 +714,12 @@ class GoogleDriveAPI:
                 supportsAllDrives=True
             ).execute()
             
+            if len(file_bytes) >= QUOTA_REFRESH_BYTES:
+                _QUOTA_CACHE["v"] = None
             return file
         
         except HttpError as e:
+            if e.resp.status == 404:
+                self.forget_folder(folder_id)
             print(f"[ERROR] Failed to upload bytes as '{filename}': {e}")
             return None
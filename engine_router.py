@@ -2,6 +2,8 @@
 Intelligent routing system for download engines
 """
 
+import re
+
 
 class EngineRouter:
     """Intelligent routing system for download engines"""
@@ -18,6 +20,10 @@ class EngineRouter:
         'zippyshare.com', 'sendspace.com', 'depositfiles.com'
     ]
     
+    # Each list as one case-insensitive pattern, so a URL is scanned once
+    _VIDEO_PLATFORM_RE = re.compile('|'.join(map(re.escape, VIDEO_PLATFORMS)), re.IGNORECASE)
+    _FILE_HOST_RE = re.compile('|'.join(map(re.escape, FILE_HOSTS)), re.IGNORECASE)
+    
     @staticmethod
     def choose_engine(url: str) -> str:
         """
@@ -29,17 +35,13 @@ class EngineRouter:
         Returns:
             'yt-dlp' | 'jdownloader' | 'playwright'
         """
-        url_lower = url.lower()
-        
         # Check for video platforms
-        for platform in EngineRouter.VIDEO_PLATFORMS:
-            if platform in url_lower:
-                return 'yt-dlp'
+        if EngineRouter._VIDEO_PLATFORM_RE.search(url):
+            return 'yt-dlp'
         
         # Check for file hosting services
-        for host in EngineRouter.FILE_HOSTS:
-            if host in url_lower:
-                return 'jdownloader'
+        if EngineRouter._FILE_HOST_RE.search(url):
+            return 'jdownloader'
         
         # Default to Playwright for unknown sites
         return 'playwright'
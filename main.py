@@ -42,6 +42,7 @@ class OmniStreamApp(ctk.CTk):
         
         # Initialize engines
         self.ytdlp_engine = None
+        self.ytdlp_engine_key = None  # (output_path, use_drive_api) it was built for
         self.jdownloader_engine = None
         self.playwright_engine = None
         self.is_downloading = False
@@ -121,9 +122,8 @@ class OmniStreamApp(ctk.CTk):
         
         # Storage Stats (NEW)
         try:
-            from storage_utils import get_storage_stats, format_storage_display
-            stats = get_storage_stats()
-            storage_text = format_storage_display(stats)
+            from storage_utils import get_storage_display
+            storage_text = get_storage_display()
         except:
             storage_text = "💾 Storage: checking..."
         
@@ -997,12 +997,20 @@ class OmniStreamApp(ctk.CTk):
             
             try:
                 if engine_choice == "yt-dlp":
-                    engine = YtDlpEngine(
-                        output_path,
-                        self.update_progress,
-                        self.log,
-                        use_drive_api=self.use_drive_api_var
-                    )
+                    # Reuse the engine (and its open yt-dlp sessions) while
+                    # the output folder and Drive mode stay the same
+                    engine_key = (output_path, self.use_drive_api_var)
+                    if not self.ytdlp_engine or self.ytdlp_engine_key != engine_key:
+                        if self.ytdlp_engine:
+                            self.ytdlp_engine.close()
+                        self.ytdlp_engine = YtDlpEngine(
+                            output_path,
+                            self.update_progress,
+                            self.log,
+                            use_drive_api=self.use_drive_api_var
+                        )
+                        self.ytdlp_engine_key = engine_key
+                    engine = self.ytdlp_engine
                     quality = self.get_quality_mapping()
                     
                     # Get max downloads if specified
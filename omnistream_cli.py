@@ -9,6 +9,7 @@ import sys
 from datetime import datetime
 from ytdlp_engine import YtDlpEngine
 from database import get_history
+from utils import DEFAULT_WORKERS
 
 def log(message, level="INFO"):
     """Simple console logger"""
@@ -49,6 +50,8 @@ Examples:
                         help='Video quality (default: best)')
     parser.add_argument('--folder-id', default='1DQDRFQtl7fkgyXoP-sqRENau2WCLJH18',
                         help='Google Drive folder ID')
+    parser.add_argument('--workers', type=int, default=DEFAULT_WORKERS,
+                        help=f'Videos downloaded at once for channels/playlists (default: {DEFAULT_WORKERS})')
     
     args = parser.parse_args()
     
@@ -66,6 +69,7 @@ Examples:
     print(f"Mode: {args.mode}")
     print(f"Quality: {args.quality}")
     print(f"Drive Folder: {args.folder_id}")
+    print(f"Workers: {args.workers}")
     print("=" * 70)
     
     # Show current download stats
@@ -86,7 +90,8 @@ Examples:
             progress_callback=progress_callback,
             log_callback=log,
             use_drive_api=True,
-            drive_folder_id=args.folder_id
+            drive_folder_id=args.folder_id,
+            max_workers=args.workers
         )
         
         log("✓ Engine initialized")
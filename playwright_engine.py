@@ -3,12 +3,22 @@ Fallback engine for generic web scraping using Playwright
 """
 
 from playwright.sync_api import sync_playwright, TimeoutError as PlaywrightTimeout
-from fake_useragent import UserAgent
 import requests
 import os
+import re
 from typing import Tuple, List, Dict, Optional, Callable
 from urllib.parse import urlparse, urljoin
 
+from utils import random_user_agent
+
+# Extensions marking a response URL as media / as a page asset (matched
+# anywhere in the URL, case-insensitively; checked on every response)
+_MEDIA_URL_RE = re.compile(r'\.(?:mp4|mkv|webm|m3u8)', re.IGNORECASE)
+_ASSET_URL_RE = re.compile(r'\.(?:jpg|png|gif|svg|css|js|woff)', re.IGNORECASE)
+
+# Characters invalid in filenames, each mapped to '_'
+_INVALID_TRANS = str.maketrans({c: '_' for c in '<>:"/\\|?*'})
+
 
 class PlaywrightEngine:
     """Fallback engine for generic web scraping"""
@@ -16,7 +26,6 @@ class PlaywrightEngine:
     def __init__(self, output_path: str, log_callback: Optional[Callable] = None):
         self.output_path = output_path
         self.log_callback = log_callback
-        self.ua = UserAgent()
         self.media_files = []
     
     def log(self, message: str, level: str = "INFO"):
@@ -50,7 +59,7 @@ class PlaywrightEngine:
                 )
                 
                 context = browser.new_context(
-                    user_agent=self.ua.random,
+                    user_agent=random_user_agent(),
                     viewport={'width': 1920, 'height': 1080}
                 )
                 
@@ -96,17 +105,18 @@ class PlaywrightEngine:
         url = response.url
         content_type = response.headers.get('content-type', '').lower()
         
+        # Ignore common non-video assets explicitly (most responses on a
+        # page, so they're dropped before any other check)
+        if _ASSET_URL_RE.search(url):
+            return
+        
         # Media type detection
         # Strict Video Filtering
         is_media = (
-            any(ext in url.lower() for ext in ['.mp4', '.mkv', '.webm', '.m3u8']) or
+            _MEDIA_URL_RE.search(url) is not None or
             any(ct in content_type for ct in ['video/', 'application/x-mpegURL'])
         )
         
-        # Ignore common non-video assets explicitly
-        if any(ext in url.lower() for ext in ['.jpg', '.png', '.gif', '.svg', '.css', '.js', '.woff']):
-             is_media = False
-        
         if is_media and response.status == 200:
             size = response.headers.get('content-length', 'Unknown')
             filename = self._extract_filename(url, response.headers)
@@ -233,7 +243,7 @@ class PlaywrightEngine:
             
             self.log(f"Downloading: {filename}")
             
-            headers = {'User-Agent': self.ua.random}
+            headers = {'User-Agent': random_user_agent()}
             with requests.get(url, stream=True, headers=headers, timeout=30) as r:
                 r.raise_for_status()
                 
@@ -272,7 +282,6 @@ class PlaywrightEngine:
     
     def _sanitize_filename(self, filename: str) -> str:
         """Remove invalid characters from filename"""
-        invalid_chars = '<>:"/\\|?*'
-        for char in invalid_chars:
-            filename = filename.replace(char, '_')
+        # Map every invalid character in one pass
+        filename = filename.translate(_INVALID_TRANS)
         return filename[:255]  # Max filename length
@@ -8,7 +8,7 @@ FILES=(
     service_account.json
     credentials.json
     token.pickle
-    youtube_token.pickle
+    youtube_token.json
     omnistream_history.db
     cookies.txt
     tiktok_cookies.txt
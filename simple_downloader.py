@@ -13,9 +13,9 @@ import shutil
 import os
 import time
 import random
-from typing import Tuple
-from fake_useragent import UserAgent
+from typing import Dict, Optional, Tuple
 from database import get_history
+from utils import random_user_agent
 from config_loader import get_folder_id as _get_folder_id
 
 _DEFAULT_FOLDER = _get_folder_id('movie_clips', '1kuOKRQQRL0ws5aOVqwkdUzdnfj5KQGjo')
@@ -25,7 +25,6 @@ class SimplifiedDownloader:
     def __init__(self, drive_api=None, log_callback=None, base_folder_id=None):
         self.drive_api = drive_api
         self.log_callback = log_callback
-        self.ua = UserAgent()
         self.base_folder_id = base_folder_id or _DEFAULT_FOLDER
     
     def log(self, message, level="INFO"):
@@ -43,9 +42,26 @@ class SimplifiedDownloader:
         4. Delete temp file
         5. Save to database
         """
+        success, msg, job = self.fetch(url, max_downloads)
+        if job is None:
+            return success, msg
+        return self.upload(job)
+    
+    def fetch(self, url: str, max_downloads: int = None) -> Tuple[bool, str, Optional[Dict]]:
+        """
+        Download stage only (steps 1-3): duplicate checks, then yt-dlp into a temp dir.
+
+        Split out so batch runs can hand the result to a separate upload
+        worker and start the next download straight away.
+
+        Returns:
+            (success, message, job). job is None when there is nothing left
+            to upload (skipped duplicate or failure); otherwise pass it to upload().
+        """
         self.log(f"Starting download: {url}")
         
         # STEP 1: Duplicate check & Pre-flight Drive Check
+        channel_folder_id = None
         try:
             with yt_dlp.YoutubeDL({'quiet': True, 'no_warnings': True}) as ydl:
                 info = ydl.extract_info(url, download=False)
@@ -55,7 +71,7 @@ class SimplifiedDownloader:
                 # 1. Local DB Check
                 if video_id and get_history().is_downloaded(video_id):
                     self.log(f"⏭️  Skipping: Already downloaded (ID: {video_id})", "WARNING")
-                    return True, f"Already in history: {title}"
+                    return True, f"Already in history: {title}", None
                 
                 # 2. Drive-Side Check (Source of Truth)
                 if self.drive_api:
@@ -70,21 +86,14 @@ class SimplifiedDownloader:
                     elif '/@' in info.get('channel_url', ''):
                         channel_info['handle'] = '@' + info.get('channel_url').split('/@')[-1].split('/')[0]
                         
-                    # Target Folder ID check (uses configured base folder)
-                    base_id = self.base_folder_id  # Configurable base folder
-                    
-                    # Create channel folder directly under Movie Clips (no platform subfolder)
-                    potential_names = []
-                    if channel_info.get('handle'): potential_names.append(channel_info['handle'])
-                    if channel_info.get('name'): potential_names.append(channel_info['name'])
-                    if channel_info.get('id'): potential_names.append(channel_info['id'])
-                    
-                    channel_folder_id = self.drive_api.find_or_create_folder(potential_names, base_id)
+                    # Create channel folder directly under the configured base
+                    # folder (no platform subfolder). Kept for the upload stage.
+                    channel_folder_id = self.drive_api.resolve_destination(channel_info, self.base_folder_id)
                     
                     if channel_folder_id:
                         # Check if file exists in Drive (checking video_id in name is safest)
                         query = f"name contains '{video_id}' and '{channel_folder_id}' in parents and trashed=false"
-                        results = self.drive_api.service.files().list(q=query, fields='files(id, name)').execute()
+                        results = self.drive_api.service.files().list(q=query, fields='files(name)', pageSize=1).execute()
                         if results.get('files'):
                             existing_file = results['files'][0]['name']
                             self.log(f"☁️  Skipping: Found in Drive ({existing_file})", "WARNING")
@@ -104,7 +113,7 @@ class SimplifiedDownloader:
                                 get_history().add_to_history(video_info_db)
                             except: pass
                             
-                            return True, f"Already in Drive: {existing_file}"
+                            return True, f"Already in Drive: {existing_file}", None
         except Exception as e:
             # self.log(f"Pre-check failed: {e}", "DEBUG")
             pass
@@ -134,7 +143,7 @@ class SimplifiedDownloader:
             'sleep_interval': 2,
             'max_sleep_interval': 5,
             'http_headers': {
-                'User-Agent': self.ua.random,
+                'User-Agent': random_user_agent(),
             }
         }
         
@@ -153,7 +162,8 @@ class SimplifiedDownloader:
                 info = ydl.extract_info(url, download=True)
                 
                 if not info:
-                    return False, "Failed to extract video information"
+                    shutil.rmtree(temp_dir, ignore_errors=True)
+                    return False, "Failed to extract video information", None
                 
                 title = info.get('title', 'Unknown')
                 
@@ -191,69 +201,105 @@ class SimplifiedDownloader:
                 
                 self.log(f"Platform: {platform}")
                 
-                # STEP 4: Upload to Drive (Using Smart Merge)
-                if self.drive_api:
-                    # Find downloaded file
-                    VIDEO_EXTS = ('.mp4', '.webm', '.mkv', '.mov', '.m4v')
-                    downloaded_file = None
-                    for file in os.listdir(temp_dir):
-                        if file.endswith(VIDEO_EXTS):
-                            downloaded_file = os.path.join(temp_dir, file)
-                            break
+                # Find downloaded file
+                VIDEO_EXTS = ('.mp4', '.webm', '.mkv', '.mov', '.m4v')
+                downloaded_file = None
+                for file in os.listdir(temp_dir):
+                    if file.endswith(VIDEO_EXTS):
+                        downloaded_file = os.path.join(temp_dir, file)
+                        break
 
-                    if not downloaded_file:
-                        self.log("Error: No video file found in temp dir", "ERROR")
-                        shutil.rmtree(temp_dir, ignore_errors=True)
-                        return False, "No video file found"
-                    
-                    self.log(f"📤 Uploading to Google Drive...")
-                    
-                    # Upload to configured base folder/[Smart Channel Folder]
-                    result = self.drive_api.upload_with_channel(
-                        file_path=downloaded_file,
-                        channel_info=channel_info,
-                        base_folder_id=self.base_folder_id,
-                        platform=platform
-                    )
-                    
-                    if result:
-                        self.log(f"✓ Uploaded to Drive: {result['name']}", "SUCCESS")
-                        self.log(f"🔗 View: {result.get('webViewLink', 'N/A')}")
-                        
-                        # STEP 5: Cleanup temp files
-                        shutil.rmtree(temp_dir, ignore_errors=True)
-                        self.log("🗑️  Temp files cleaned up")
-                        
-                        # STEP 6: Save to history database
-                        try:
-                            video_info_db = {
-                                'video_id': info.get('id'),
-                                'title': info.get('title'),
-                                'channel_name': channel_info.get('name', 'Unknown'),
-                                'url': info.get('webpage_url') or url,
-                                'file_path': f"Travis/YouTube/{channel_info.get('name')}/{os.path.basename(downloaded_file)}",
-                                'file_size': os.path.getsize(downloaded_file) if os.path.exists(downloaded_file) else 0,
-                                'platform': platform,
-                                'format': info.get('ext'),
-                                'duration': info.get('duration')
-                            }
-                            get_history().add_to_history(video_info_db)
-                        except Exception as e:
-                            self.log(f"Warning: Could not add to history: {e}", "WARNING")
-                        
-                        return True, f"Uploaded to Drive: {title}"
-                    else:
-                        self.log("✗ Upload failed", "ERROR")
-                        shutil.rmtree(temp_dir, ignore_errors=True)
-                        return False, "Upload to Drive failed"
-                else:
-                    # No Drive API - just cleanup
-                    self.log(f"✓ Downloaded: {title}", "SUCCESS")
+                if self.drive_api and not downloaded_file:
+                    self.log("Error: No video file found in temp dir", "ERROR")
                     shutil.rmtree(temp_dir, ignore_errors=True)
-                    return True, f"Downloaded: {title}"
+                    return False, "No video file found", None
+                
+                job = {
+                    'url': url,
+                    'info': info,
+                    'title': title,
+                    'channel_info': channel_info,
+                    'platform': platform,
+                    'file': downloaded_file,
+                    'temp_dir': temp_dir,
+                    'folder_id': channel_folder_id
+                }
+                return True, f"Downloaded: {title}", job
         
         except Exception as e:
             self.log(f"✗ Download error: {e}", "ERROR")
             if os.path.exists(temp_dir):
                 shutil.rmtree(temp_dir, ignore_errors=True)
-            return False, f"Download failed: {e}"
+            return False, f"Download failed: {e}", None
+    
+    def upload(self, job: Dict) -> Tuple[bool, str]:
+        """
+        Upload stage (steps 4-6): push a fetch() result to Drive, clean up, record history.
+
+        Always removes the job's temp dir.
+        """
+        info = job['info']
+        title = job['title']
+        channel_info = job['channel_info']
+        platform = job['platform']
+        downloaded_file = job['file']
+        temp_dir = job['temp_dir']
+        
+        try:
+            # STEP 4: Upload to Drive (Using Smart Merge)
+            if not self.drive_api:
+                # No Drive API - just cleanup
+                self.log(f"✓ Downloaded: {title}", "SUCCESS")
+                return True, f"Downloaded: {title}"
+            
+            self.log(f"📤 Uploading to Google Drive...")
+            file_size = os.path.getsize(downloaded_file)
+            
+            # Upload to configured base folder/[Smart Channel Folder], reusing
+            # the folder the pre-flight check already resolved when it ran
+            if job.get('folder_id'):
+                result = self.drive_api.upload_file(downloaded_file, job['folder_id'])
+            else:
+                result = self.drive_api.upload_with_channel(
+                    file_path=downloaded_file,
+                    channel_info=channel_info,
+                    base_folder_id=self.base_folder_id,
+                    platform=platform
+                )
+            
+            if not result:
+                self.log("✗ Upload failed", "ERROR")
+                return False, "Upload to Drive failed"
+            
+            self.log(f"✓ Uploaded to Drive: {result['name']}", "SUCCESS")
+            self.log(f"🔗 View: {result.get('webViewLink', 'N/A')}")
+            
+            # STEP 5: Cleanup temp files
+            shutil.rmtree(temp_dir, ignore_errors=True)
+            self.log("🗑️  Temp files cleaned up")
+            
+            # STEP 6: Save to history database
+            try:
+                video_info_db = {
+                    'video_id': info.get('id'),
+                    'title': info.get('title'),
+                    'channel_name': channel_info.get('name', 'Unknown'),
+                    'url': info.get('webpage_url') or job['url'],
+                    'file_path': f"Travis/YouTube/{channel_info.get('name')}/{os.path.basename(downloaded_file)}",
+                    'file_size': file_size,
+                    'platform': platform,
+                    'format': info.get('ext'),
+                    'duration': info.get('duration')
+                }
+                get_history().add_to_history(video_info_db)
+            except Exception as e:
+                self.log(f"Warning: Could not add to history: {e}", "WARNING")
+            
+            return True, f"Uploaded to Drive: {title}"
+        
+        except Exception as e:
+            self.log(f"✗ Upload error: {e}", "ERROR")
+            return False, f"Upload failed: {e}"
+        
+        finally:
+            shutil.rmtree(temp_dir, ignore_errors=True)
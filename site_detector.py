@@ -3,11 +3,29 @@ Site Detection Module
 Intelligent pattern matching for 15+ platforms with capability detection
 """
 
-from typing import Dict, List, Optional
+from types import MappingProxyType
+from typing import Mapping
 from urllib.parse import urlparse
 import re
 
 
+# Bulk-URL markers (playlist/channel/album pages), matched in one regex pass
+_BULK_RE = re.compile(r'playlist|channel|/c/|/@|/user/|albums|sets|collections')
+
+# URL type checks in priority order: a channel's playlist is still a playlist
+_URL_TYPE_RES = (
+    ('playlist', re.compile(r'playlist|list=')),
+    ('channel', re.compile(r'channel|/c/|/@|/user/')),
+    ('album', re.compile(r'album')),
+)
+
+# Fields exposed by SiteDetector._get_site_info (everything except aliases)
+_INFO_FIELDS = (
+    'name', 'icon', 'content_types', 'quality_options', 'bulk_support',
+    'date_filter', 'supports_playlists', 'supports_channels',
+)
+
+
 class SiteDetector:
     """Detect platform and capabilities from URL"""
     
@@ -180,8 +198,21 @@ class SiteDetector:
         }
     }
     
+    # alias domain -> site key, so detection is one dict probe per domain suffix
+    _DOMAIN_INDEX = {
+        alias: site_key
+        for site_key, site_data in SITE_PATTERNS.items()
+        for alias in site_data['aliases']
+    }
+    
+    # Site info is static, so build each read-only view once and share it
+    _CACHED_INFO = {
+        site_key: MappingProxyType({'key': site_key, **{f: site_data[f] for f in _INFO_FIELDS}})
+        for site_key, site_data in SITE_PATTERNS.items()
+    }
+    
     @classmethod
-    def detect_site(cls, url: str) -> Dict:
+    def detect_site(cls, url: str) -> Mapping:
         """
         Detect platform from URL
         
@@ -189,62 +220,42 @@ class SiteDetector:
             url: URL to analyze
             
         Returns:
-            dict with site info and capabilities
+            Read-only mapping with site info and capabilities
         """
         if not url:
             return cls._get_site_info('generic')
         
-        url_lower = url.lower()
-        parsed = urlparse(url_lower)
-        domain = parsed.netloc.replace('www.', '')
+        parsed = urlparse(url.strip())
+        if not parsed.netloc:
+            # Scheme-less input like "youtube.com/watch?v=..."
+            parsed = urlparse('//' + url.strip())
+        domain = parsed.hostname or ''
         
-        # Check each platform's aliases
-        for site_key, site_data in cls.SITE_PATTERNS.items():
-            if site_key == 'generic':
-                continue
-                
-            for alias in site_data['aliases']:
-                if alias in domain or alias in url_lower:
-                    return cls._get_site_info(site_key)
+        # Try the host and each parent domain: m.youtube.com -> youtube.com
+        parts = domain.split('.')
+        for i in range(len(parts) - 1):
+            site_key = cls._DOMAIN_INDEX.get('.'.join(parts[i:]))
+            if site_key:
+                return cls._get_site_info(site_key)
         
         # Default to generic
         return cls._get_site_info('generic')
     
     @classmethod
-    def _get_site_info(cls, site_key: str) -> Dict:
-        """Get complete site information"""
-        site_data = cls.SITE_PATTERNS.get(site_key, cls.SITE_PATTERNS['generic'])
-        return {
-            'key': site_key,
-            'name': site_data['name'],
-            'icon': site_data['icon'],
-            'content_types': site_data['content_types'],
-            'quality_options': site_data['quality_options'],
-            'bulk_support': site_data['bulk_support'],
-            'date_filter': site_data['date_filter'],
-            'supports_playlists': site_data['supports_playlists'],
-            'supports_channels': site_data['supports_channels']
-        }
+    def _get_site_info(cls, site_key: str) -> Mapping:
+        """Get complete site information (shared, read-only)"""
+        return cls._CACHED_INFO.get(site_key, cls._CACHED_INFO['generic'])
     
     @classmethod
     def is_bulk_url(cls, url: str) -> bool:
         """Check if URL is a bulk operation (playlist/channel)"""
-        bulk_indicators = [
-            'playlist', 'channel', '/c/', '/@', '/user/',
-            'albums', 'sets', 'collections'
-        ]
-        return any(indicator in url.lower() for indicator in bulk_indicators)
+        return _BULK_RE.search(url.lower()) is not None
     
     @classmethod
     def get_url_type(cls, url: str) -> str:
         """Determine URL type (single, playlist, channel)"""
         url_lower = url.lower()
-        
-        if 'playlist' in url_lower or 'list=' in url_lower:
-            return 'playlist'
-        elif any(x in url_lower for x in ['channel', '/c/', '/@', '/user/']):
-            return 'channel'
-        elif 'album' in url_lower:
-            return 'album'
-        else:
-            return 'single'
+        for url_type, pattern in _URL_TYPE_RES:
+            if pattern.search(url_lower):
+                return url_type
+        return 'single'
@@ -6,28 +6,67 @@ OmniStream Smart Batch Downloader (Hybrid Edition)
 """
 
 import sys
-import time
+import atexit
 import os
+import threading
 import yt_dlp
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from typing import List
 from simple_drive import SimpleDriveAPI
 from simple_downloader import SimplifiedDownloader
+from utils import DEFAULT_WORKERS
 
 try:
     from playwright.sync_api import sync_playwright
+    from playwright.sync_api import TimeoutError as PlaywrightTimeoutError
     PLAYWRIGHT_AVAILABLE = True
 except ImportError:
     PLAYWRIGHT_AVAILABLE = False
     print("Warning: Playwright not found. Browser fallback disabled.")
 
+def _parse_netscape_cookies(text):
+    """Parse a Netscape cookies.txt body into Playwright cookie dicts"""
+    rows = (line.split('\t') for line in text.splitlines() if line and line[0] != '#')
+    return [
+        {
+            'domain': fields[0],
+            'path': fields[2],
+            'secure': fields[3].lower() == 'true',
+            'expires': int(fields[4]) if fields[4] else 0,
+            'name': fields[5],
+            'value': fields[6]
+        }
+        for fields in rows if len(fields) >= 7
+    ]
+
+# Video/post links per platform (YouTube, X, TikTok, Instagram). Matching in the
+# CSS selector lets the browser's native DOM engine skip every other anchor.
+_LINK_SELECTOR = ', '.join(f'a[href*="{part}"]' for part in (
+    '/shorts/', '/watch?v=', '/status/', '/video/', '/p/', '/reel/', '/tv/'
+))
+
+# Channel tabs that already pin what yt-dlp lists; don't append /shorts to them
+_CHANNEL_TABS = ('/shorts', '/videos', '/streams', '/playlists', '/featured')
+
+def _fast_candidates(channel_url):
+    """
+    URLs for extract_standard to try, in priority order.
+
+    Forcing the Shorts tab only makes sense for a bare channel URL; for a
+    tab, playlist or query URL it would just cost another failing yt-dlp call.
+    """
+    base = channel_url.rstrip('/')
+    candidates = []
+    if '?' not in base and not base.endswith(_CHANNEL_TABS):
+        candidates.append(base + '/shorts')  # Priority 1: Force Shorts tab
+    candidates.append(channel_url)           # Priority 2: As provided
+    return candidates
+
 def extract_standard(channel_url, max_videos=None):
     """Standard yt-dlp extraction (Fast)"""
     print(f"⚡ Trying Fast Extraction: {channel_url}")
     
-    urls_to_try = [
-        channel_url.rstrip('/') + '/shorts',  # Priority 1: Force Shorts tab
-        channel_url,                          # Priority 2: As provided
-    ]
+    urls_to_try = _fast_candidates(channel_url)
     
     for try_url in urls_to_try:
         try:
@@ -44,6 +83,7 @@ def extract_standard(channel_url, max_videos=None):
                 info = ydl.extract_info(try_url, download=False)
                 if info and 'entries' in info:
                     videos = []
+                    seen = set()
                     for entry in info['entries']:
                         if not entry: continue
                         
@@ -54,7 +94,8 @@ def extract_standard(channel_url, max_videos=None):
                         if not url and entry.get('id'):
                             url = f"https://youtube.com/watch?v={entry['id']}"
                             
-                        if url and url not in videos:
+                        if url and url not in seen:
+                            seen.add(url)
                             videos.append(url)
                             
                     if len(videos) > 0:
@@ -66,6 +107,55 @@ def extract_standard(channel_url, max_videos=None):
     print("  ✗ Fast extraction yielded no results (or anti-bot blocked)")
     return []
 
+# One headless browser shared by every extract_browser() call in the process,
+# so batch scripts walking many channels pay the launch and cookie load once.
+# Playwright's sync API is bound to the thread that started it: call
+# extract_browser() from one thread only.
+_BROWSER_SESSION = None  # (playwright, browser, context)
+
+def _browser_context():
+    """Return the shared browser context, launching it on first use"""
+    global _BROWSER_SESSION
+    if _BROWSER_SESSION is None:
+        pw = sync_playwright().start()
+        try:
+            browser = pw.chromium.launch(headless=True)
+            context = browser.new_context(user_agent='Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36')
+        except Exception:
+            pw.stop()
+            raise
+        
+        # Load cookies if available (Crucial for X/Twitter)
+        if os.path.exists('cookies.txt'):
+            try:
+                with open('cookies.txt', 'r') as f:
+                    cookies = _parse_netscape_cookies(f.read())
+                if cookies:
+                    context.add_cookies(cookies)
+                    print("  🍪 Loaded cookies from cookies.txt")
+            except Exception as e:
+                print(f"  Warning: Failed to load cookies: {e}")
+        
+        _BROWSER_SESSION = (pw, browser, context)
+        atexit.register(_close_browser)
+    return _BROWSER_SESSION[2]
+
+def _close_browser():
+    """Shut down the shared browser (idempotent; registered with atexit)"""
+    global _BROWSER_SESSION
+    if _BROWSER_SESSION is None:
+        return
+    pw, browser, _ = _BROWSER_SESSION
+    _BROWSER_SESSION = None
+    try:
+        browser.close()
+    except Exception:
+        pass
+    try:
+        pw.stop()
+    except Exception:
+        pass
+
 def extract_browser(channel_url, max_videos=None):
     """Browser-based extraction using Playwright (Smart)"""
     if not PLAYWRIGHT_AVAILABLE:
@@ -75,7 +165,8 @@ def extract_browser(channel_url, max_videos=None):
     effective_limit = max_videos if max_videos is not None else 9999
         
     print(f"\n🧠 Switch to Browser Engine applied: {channel_url}")
-    print("  Launching headless browser... (this takes a few seconds)")
+    if _BROWSER_SESSION is None:
+        print("  Launching headless browser... (this takes a few seconds)")
     
     # Extract strict handle for filtering (e.g. 'CinemaTweets1')
     target_handle = None
@@ -98,49 +189,27 @@ def extract_browser(channel_url, max_videos=None):
             print(f"  🎯 Strict filtering active: Only posts from @{target_handle}")
     
     videos = []
+    seen = set()  # O(1) dedup; the list keeps discovery order
     
     try:
-        with sync_playwright() as p:
-            # Launch browser
-            browser = p.chromium.launch(headless=True)
-            
-            # Load cookies if available (Crucial for X/Twitter)
-            context = browser.new_context(user_agent='Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36')
-            
-            if os.path.exists('cookies.txt'):
-                try:
-                    # Simple Netscape parser
-                    cookies = []
-                    with open('cookies.txt', 'r') as f:
-                        for line in f:
-                            if line.startswith('#') or not line.strip(): continue
-                            fields = line.strip().split('\t')
-                            if len(fields) >= 7:
-                                cookies.append({
-                                    'domain': fields[0],
-                                    'path': fields[2],
-                                    'secure': fields[3].lower() == 'true',
-                                    'expires': int(fields[4]) if fields[4] else 0,
-                                    'name': fields[5],
-                                    'value': fields[6]
-                                })
-                    if cookies:
-                        context.add_cookies(cookies)
-                        print("  🍪 Loaded cookies from cookies.txt")
-                except Exception as e:
-                    print(f"  Warning: Failed to load cookies: {e}")
-
-            page = context.new_page()
-            
+        page = _browser_context().new_page()
+        try:
             # Go to URL
             print(f"  Navigating to page...")
             page.goto(channel_url, timeout=60000)
             
-            # Special wait for X/Twitter
+            # X/Twitter and TikTok hydrate client-side: wait until the first
+            # post links render instead of a fixed sleep
+            hydration_selector = None
             if 'x.com' in channel_url or 'twitter.com' in channel_url:
-                time.sleep(5) # Wait for hydration
+                hydration_selector = 'a[href*="/status/"]'
             elif 'tiktok.com' in channel_url:
-                 time.sleep(5) # Wait for TikTok hydration
+                hydration_selector = 'a[href*="/video/"]'
+            if hydration_selector:
+                try:
+                    page.wait_for_selector(hydration_selector, timeout=10000)
+                except PlaywrightTimeoutError:
+                    pass
             
             # Scroll loop
             last_count = 0
@@ -150,40 +219,44 @@ def extract_browser(channel_url, max_videos=None):
             
             # We increase retries/buffer since we might discard many retweets
             while len(videos) < effective_limit and retries < 15:
-                # Scroll down
+                # Scroll down, then wait (max 3s) until the page grows or its
+                # links change rather than always sleeping the full 3s
+                before = page.evaluate(
+                    "() => [document.querySelectorAll('a').length, document.body.scrollHeight]"
+                )
                 page.evaluate("window.scrollTo(0, document.body.scrollHeight)")
-                time.sleep(3)  # Wait for load
+                try:
+                    page.wait_for_function(
+                        "([n, h]) => document.querySelectorAll('a').length !== n"
+                        " || document.body.scrollHeight > h",
+                        arg=before,
+                        timeout=3000
+                    )
+                except PlaywrightTimeoutError:
+                    pass
                 
-                # Extract links
-                links = page.evaluate("""() => {
+                # Extract links not returned by an earlier scroll. The set lives
+                # in the page, so each pass only ships new hrefs over CDP. (An
+                # index cursor would break on X/TikTok, which recycle DOM nodes.)
+                links = page.evaluate("""(selector) => {
+                    const seen = window.__omniSeen || (window.__omniSeen = new Set());
                     const results = [];
-                    const anchors = Array.from(document.querySelectorAll('a'));
-                    anchors.forEach(a => {
+                    for (const a of document.querySelectorAll(selector)) {
                         const href = a.href;
-                        // YouTube Checks
-                        if (href && (href.includes('/shorts/') || href.includes('/watch?v='))) {
-                            if (!href.includes('&list=') && !href.includes('&index=')) {
-                                results.push(href);
-                            }
-                        }
-                        // Twitter/X Checks
-                        if (href && (href.includes('/status/'))) {
-                             results.push(href);
+                        if (!href || seen.has(href)) continue;
+                        seen.add(href);
+                        // YouTube: skip watch links opened in playlist context
+                        if ((href.includes('/shorts/') || href.includes('/watch?v=')) &&
+                                (href.includes('&list=') || href.includes('&index='))) {
+                            continue;
                         }
-                        // TikTok Checks
-                        if (href && href.includes('/video/')) {
-                             results.push(href);
-                        }
-                        // Instagram Checks
-                        if (href && (href.includes('/p/') || href.includes('/reel/') || href.includes('/tv/'))) {
-                             results.push(href);
-                        }
-                    });
+                        results.push(href);
+                    }
                     return results;
-                }""")
+                }""", _LINK_SELECTOR)
                 
-                # Deduplicate and clean (Preserving Order: Latest -> Oldest)
-                # 'links' contains new links found in this scroll. They appear top-down.
+                # Clean (Preserving Order: Latest -> Oldest)
+                # 'links' contains only links first seen in this scroll. They appear top-down.
                 for link in links:
                     base = None
                     # Clean URL query params
@@ -222,7 +295,8 @@ def extract_browser(channel_url, max_videos=None):
                                  base = f"https://www.tiktok.com/{user_part}/video/{id_part}"
                     
                     # Add if new (Order Preserved)
-                    if base and base not in videos:
+                    if base and base not in seen:
+                        seen.add(base)
                         videos.append(base)
 
                 print(f"  Found {len(videos)} unique matching videos so far...")
@@ -234,15 +308,104 @@ def extract_browser(channel_url, max_videos=None):
                     
                 last_count = len(videos)
                 
-            browser.close()
+        finally:
+            page.close()
             
     except Exception as e:
         print(f"  ✗ Browser extraction failed: {e}")
+        # The shared browser may have crashed; relaunch on the next call
+        _close_browser()
         return []
         
     print(f"  ✓ Browser engine found {len(videos)} videos")
     return videos if max_videos is None else videos[:max_videos]
 
+def fetch_url(url, downloader, drive_api, folder_id, label=''):
+    """
+    Download stage of the batch pipeline. Walks the fallback chain until an
+    engine succeeds: standard yt-dlp → Playwright → platform bypass
+    (Snaptik / Cobalt). A standard yt-dlp download is not uploaded here.
+
+    Returns:
+        (success, job). job is a SimplifiedDownloader.fetch() result still
+        waiting for upload_job(), or None when the URL is already settled
+        (duplicate, fallback engine upload, or failure).
+    """
+    tag = f"[{label}] " if label else ''
+    print(f"\n{tag}{url}")
+    success, msg, job = downloader.fetch(url)
+    if success:
+        if job is None:
+            print(f"  {tag}✓ [Engine: standard yt-dlp] {msg}")
+        return True, job
+    return run_fallbacks(url, msg, drive_api, folder_id, tag), None
+
+def upload_job(downloader, job, label=''):
+    """Upload stage of the batch pipeline. Returns True on success."""
+    tag = f"[{label}] " if label else ''
+    success, msg = downloader.upload(job)
+    if success:
+        print(f"  {tag}✓ [Engine: standard yt-dlp] {msg}")
+    else:
+        print(f"  {tag}✗ {msg}")
+    return success
+
+def run_fallbacks(url, msg, drive_api, folder_id, tag=''):
+    """
+    Fallback chain after the standard engine failed with `msg`.
+
+    Returns:
+        True if a fallback engine succeeded
+    """
+    # ── FALLBACK 1: Playwright browser engine ─────────────────────────────
+    if not PLAYWRIGHT_AVAILABLE:
+        print(f"  {tag}✗ Failed (Playwright not available): {msg}")
+        return False
+
+    print(f"  {tag}⚠️ Standard download failed ({msg}). Trying Browser Fallback...")
+    try:
+        from playwright_engine import PlaywrightEngine
+        import tempfile
+        with tempfile.TemporaryDirectory() as temp_dir:
+            pw_engine = PlaywrightEngine(output_path=temp_dir)
+            pw_success, pw_msg = pw_engine.download(url)
+
+            if pw_success:
+                print(f"  {tag}✓ [Engine: playwright] {pw_msg}")
+                return True
+
+            # ── FALLBACK 2 & 3: platform-specific bypasses ─────────────────
+            # Only reached when BOTH standard and Playwright failed.
+            print(f"  {tag}✗ Browser Fallback Failed: {pw_msg}")
+
+            if 'tiktok.com' in url:
+                print(f"  {tag}⚠️ Trying Snaptik Bypass (TikTok)...")
+                try:
+                    from download_snaptik import download_snaptik_direct
+                    if download_snaptik_direct(url, drive_api):
+                        print(f"  {tag}✓ [Engine: snaptik] success")
+                        return True
+                    print(f"  {tag}✗ Snaptik Bypass Failed")
+                except Exception as e:
+                    print(f"  {tag}✗ Snaptik Error: {e}")
+
+            elif 'youtube.com' in url or 'youtu.be' in url:
+                print(f"  {tag}⚠️ Trying Web Bypass / 10Downloader (YouTube)...")
+                try:
+                    from download_cobalt import download_cobalt_direct
+                    if download_cobalt_direct(url, drive_api, folder_id):
+                        print(f"  {tag}✓ [Engine: cobalt/10dl] success")
+                        return True
+                    print(f"  {tag}✗ Web Bypass Failed")
+                except Exception as e:
+                    print(f"  {tag}✗ Web Bypass Error: {e}")
+
+            return False
+
+    except Exception as e:
+        print(f"  {tag}✗ Browser Fallback Error: {e}")
+        return False
+
 def main():
     if len(sys.argv) < 2:
         print("Usage: python smart_batch.py <channel_url> [max_videos] [folder_id]")
@@ -280,69 +443,64 @@ def main():
         
     downloader = SimplifiedDownloader(drive_api=drive_api, base_folder_id=folder_id)
     
+    # Videos are independent I/O-bound jobs, so overlap them across a small
+    # worker pool (OMNI_PAR, default DEFAULT_WORKERS).
+    # Uploads run in their own pool (OMNI_UPLOAD_PAR, default 2) so a download
+    # worker moves on to the next URL while its file is still uploading.
+    workers = max(1, int(os.getenv('OMNI_PAR', DEFAULT_WORKERS)))
+    upload_workers = max(1, int(os.getenv('OMNI_UPLOAD_PAR', 2)))
+    total = len(video_urls)
     successful = 0
     failed = 0
     
-    for i, url in enumerate(video_urls, 1):
-        print(f"\n[{i}/{len(video_urls)}] {url}")
-        success, msg = downloader.download(url)
-        if success:
-            print(f"  ✓ [Engine: standard yt-dlp] {msg}")
-            successful += 1
-        else:
-            # ── FALLBACK 1: Playwright browser engine ─────────────────────────
-            if PLAYWRIGHT_AVAILABLE:
-                print(f"  ⚠️ Standard download failed ({msg}). Trying Browser Fallback...")
-                try:
-                    from playwright_engine import PlaywrightEngine
-                    import tempfile
-                    with tempfile.TemporaryDirectory() as temp_dir:
-                        pw_engine = PlaywrightEngine(output_path=temp_dir)
-                        pw_success, pw_msg = pw_engine.download(url)
-
-                        if pw_success:
-                            print(f"  ✓ [Engine: playwright] {pw_msg}")
-                            successful += 1
-                        else:
-                            # ── FALLBACK 2 & 3: platform-specific bypasses ─────
-                            # Only reached when BOTH standard and Playwright failed.
-                            print(f"  ✗ Browser Fallback Failed: {pw_msg}")
-                            bypass_success = False
-
-                            if 'tiktok.com' in url:
-                                print(f"  ⚠️ Trying Snaptik Bypass (TikTok)...")
-                                try:
-                                    from download_snaptik import download_snaptik_direct
-                                    if download_snaptik_direct(url, drive_api):
-                                        print(f"  ✓ [Engine: snaptik] success")
-                                        successful += 1
-                                        bypass_success = True
-                                    else:
-                                        print(f"  ✗ Snaptik Bypass Failed")
-                                except Exception as e:
-                                    print(f"  ✗ Snaptik Error: {e}")
-
-                            elif 'youtube.com' in url or 'youtu.be' in url:
-                                print(f"  ⚠️ Trying Web Bypass / 10Downloader (YouTube)...")
-                                try:
-                                    from download_cobalt import download_cobalt_direct
-                                    if download_cobalt_direct(url, drive_api, folder_id):
-                                        print(f"  ✓ [Engine: cobalt/10dl] success")
-                                        successful += 1
-                                        bypass_success = True
-                                    else:
-                                        print(f"  ✗ Web Bypass Failed")
-                                except Exception as e:
-                                    print(f"  ✗ Web Bypass Error: {e}")
-
-                            if not bypass_success:
-                                failed += 1
-
-                except Exception as e:
-                    print(f"  ✗ Browser Fallback Error: {e}")
-                    failed += 1
+    # Bound downloaded-but-not-uploaded files so temp storage can't pile up
+    staged = threading.BoundedSemaphore(workers + upload_workers)
+    
+    def download_stage(url, label):
+        staged.acquire()
+        job = None
+        try:
+            success, job = fetch_url(url, downloader, drive_api, folder_id, label)
+        finally:
+            if job is None:
+                staged.release()
+        return success, job, label
+    
+    def upload_stage(job, label):
+        try:
+            return upload_job(downloader, job, label)
+        finally:
+            staged.release()
+    
+    with ThreadPoolExecutor(max_workers=workers) as dl_pool, \
+            ThreadPoolExecutor(max_workers=upload_workers) as ul_pool:
+        downloads = [
+            dl_pool.submit(download_stage, url, f"{i}/{total}")
+            for i, url in enumerate(video_urls, 1)
+        ]
+        uploads = []
+        for future in as_completed(downloads):
+            try:
+                success, job, label = future.result()
+            except Exception as e:
+                print(f"  ✗ Download error: {e}")
+                failed += 1
+                continue
+            if job is not None:
+                uploads.append(ul_pool.submit(upload_stage, job, label))
+            elif success:
+                successful += 1
+            else:
+                failed += 1
+        for future in as_completed(uploads):
+            try:
+                uploaded = future.result()
+            except Exception as e:
+                print(f"  ✗ Upload error: {e}")
+                uploaded = False
+            if uploaded:
+                successful += 1
             else:
-                print(f"  ✗ Failed (Playwright not available): {msg}")
                 failed += 1
             
     print(f"\nCompleted: {successful} success, {failed} failed")
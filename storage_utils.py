@@ -4,14 +4,39 @@ Storage management utilities for OmniStream
 Checks disk space and prevents critical low-space situations
 """
 
+import bisect
 import shutil
 import os
-from typing import Tuple
+import time
+from types import MappingProxyType
+from typing import Dict, Mapping, Tuple
+
+# disk_usage() results per path, reused for a couple of seconds so UI refresh
+# loops don't issue a statfs() on every repaint
+_DU_TTL = 2.0
+_DU_CACHE: Dict[str, Tuple[float, Tuple[float, float, float]]] = {}
+
+_GB = 1 << 30
+
+
+if hasattr(os, "statvfs"):
+    def _disk_usage(path: str) -> Tuple[int, int, int]:
+        """(free, used, total) bytes straight from statvfs(), as shutil computes them"""
+        st = os.statvfs(path)
+        frsize = st.f_frsize
+        return (st.f_bavail * frsize,
+                (st.f_blocks - st.f_bfree) * frsize,
+                st.f_blocks * frsize)
+else:
+    def _disk_usage(path: str) -> Tuple[int, int, int]:
+        """(free, used, total) bytes via shutil on platforms without statvfs()"""
+        st = shutil.disk_usage(path)
+        return st.free, st.used, st.total
 
 
 def check_disk_space(path: str = "/", min_gb: float = 10.0) -> Tuple[bool, float, float, float]:
     """
-    Check available disk space
+    Check available disk space (results are reused for up to 2s per path)
     
     Args:
         path: Path to check (default: root)
@@ -21,10 +46,16 @@ def check_disk_space(path: str = "/", min_gb: float = 10.0) -> Tuple[bool, float
         Tuple of (has_enough_space, free_gb, used_gb, total_gb)
     """
     try:
-        stat = shutil.disk_usage(path)
-        free_gb = stat.free / (1024**3)
-        used_gb = stat.used / (1024**3)
-        total_gb = stat.total / (1024**3)
+        now = time.monotonic()
+        cached = _DU_CACHE.get(path)
+        if cached and now - cached[0] < _DU_TTL:
+            free_gb, used_gb, total_gb = cached[1]
+        else:
+            free, used, total = _disk_usage(path)
+            free_gb = free / _GB
+            used_gb = used / _GB
+            total_gb = total / _GB
+            _DU_CACHE[path] = (now, (free_gb, used_gb, total_gb))
         
         has_space = free_gb >= min_gb
         
@@ -35,44 +66,76 @@ def check_disk_space(path: str = "/", min_gb: float = 10.0) -> Tuple[bool, float
         # Return safe defaults (assume no space to be safe)
         return False, 0.0, 0.0, 0.0
 
+# Free-GB boundaries (sorted) and the (status, color, icon) below each;
+# the last level applies at or above the highest boundary
+_STATUS_THRESHOLDS = (5, 10, 50)
+_STATUS_LEVELS = (
+    ("critical", "#ff0000", "🔴"),
+    ("warning", "#ffaa00", "🟡"),
+    ("moderate", "#00aaff", "🟢"),
+    ("good", "#00ff00", "🟢"),
+)
+
+# UI storage chip text
+_DISPLAY_TEMPLATE = "{icon} Storage: {free:.1f}GB free / {total:.1f}GB ({percent:.0f}% used)"
+
+# Last get_storage_stats() result, shared while fresh
+_STATS_TTL = 1.5
+_STATS_CACHE = {"t": 0.0, "v": None}
+
+
+def reset_caches():
+    """Drop memoized disk usage and stats (e.g. after freeing space, or in tests)"""
+    _DU_CACHE.clear()
+    _STATS_CACHE["v"] = None
+
 
-def get_storage_stats() -> dict:
+def get_storage_stats() -> Mapping[str, object]:
     """
     Get comprehensive storage statistics
     
+    The same read-only mapping is returned for up to 1.5s so UI repaints
+    don't rebuild it every frame.
+    
     Returns:
-        Dictionary with storage info and status
+        Read-only mapping with storage info and status
     """
+    now = time.monotonic()
+    if _STATS_CACHE["v"] is not None and now - _STATS_CACHE["t"] < _STATS_TTL:
+        return _STATS_CACHE["v"]
+    
     has_space, free_gb, used_gb, total_gb = check_disk_space()
     
-    # Determine status level
-    if free_gb < 5:
-        status = "critical"
-        color = "#ff0000"
-        icon = "🔴"
-    elif free_gb < 10:
-        status = "warning"
-        color = "#ffaa00"
-        icon = "🟡"
-    elif free_gb < 50:
-        status = "moderate"
-        color = "#00aaff"
-        icon = "🟢"
-    else:
-        status = "good"
-        color = "#00ff00"
-        icon = "🟢"
+    # Determine status level (bisect_right: exactly 5GB is "warning")
+    status, color, icon = _STATUS_LEVELS[bisect.bisect_right(_STATUS_THRESHOLDS, free_gb)]
     
-    return {
+    percent_used = (used_gb / total_gb * 100) if total_gb > 0 else 0
+    stats = MappingProxyType({
         'free_gb': free_gb,
         'used_gb': used_gb,
         'total_gb': total_gb,
-        'percent_used': (used_gb / total_gb * 100) if total_gb > 0 else 0,
+        'percent_used': percent_used,
         'status': status,
         'color': color,
         'icon': icon,
-        'has_space': has_space
-    }
+        'has_space': has_space,
+        # Rendered once here rather than on every UI tick
+        'display': _DISPLAY_TEMPLATE.format(
+            icon=icon, free=free_gb, total=total_gb, percent=percent_used
+        )
+    })
+    _STATS_CACHE["t"], _STATS_CACHE["v"] = now, stats
+    return stats
+
+
+def get_storage_display() -> str:
+    """
+    Storage chip text, for callers that only paint the text
+    
+    Returns:
+        The 'display' entry of the (shared) get_storage_stats() result
+    """
+    return get_storage_stats()['display']
 
 
 def format_storage_display(stats: dict) -> str:
@@ -85,9 +148,10 @@ def format_storage_display(stats: dict) -> str:
     Returns:
         Formatted string for display
     """
-    icon = stats['icon']
-    free = stats['free_gb']
-    total = stats['total_gb']
-    percent = stats['percent_used']
-    
-    return f"{icon} Storage: {free:.1f}GB free / {total:.1f}GB ({percent:.0f}% used)"
+    display = stats.get('display')
+    if display is not None:
+        return display
+    return _DISPLAY_TEMPLATE.format(
+        icon=stats['icon'], free=stats['free_gb'],
+        total=stats['total_gb'], percent=stats['percent_used']
+    )
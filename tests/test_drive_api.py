@@ -0,0 +1,268 @@
+"""
+Tests for GoogleDriveAPI helpers.
+
+The Google client libraries are stubbed; instances are built with __new__
+(skipping authentication) around a MagicMock Drive service, so no network
+calls happen.
+"""
+
+import sys
+import os
+import json
+import threading
+import types
+import unittest
+from unittest.mock import MagicMock, mock_open, patch
+
+# ---------------------------------------------------------------------------
+# Stub the Google client libraries
+# ---------------------------------------------------------------------------
+
+
+class HttpError(Exception):
+    """Minimal googleapiclient.errors.HttpError: only resp.status is read"""
+
+    def __init__(self, status):
+        super().__init__(f"HTTP {status}")
+        self.resp = types.SimpleNamespace(status=status)
+
+
+def _stub(name, **attrs):
+    module = types.ModuleType(name)
+    module.__dict__.update(attrs)
+    return sys.modules.setdefault(name, module)
+
+
+_stub("httplib2", Response=dict)
+_stub("google")
+_stub("google.oauth2")
+_stub("google.oauth2.credentials", Credentials=MagicMock())
+_stub("google.oauth2.service_account", Credentials=MagicMock())
+_stub("google.auth")
+_stub("google.auth.transport")
+_stub("google.auth.transport.requests", Request=MagicMock())
+_stub("google_auth_oauthlib")
+_stub("google_auth_oauthlib.flow", InstalledAppFlow=MagicMock())
+_stub("google_auth_httplib2", AuthorizedHttp=MagicMock())
+_stub("googleapiclient")
+_stub("googleapiclient.discovery", build=MagicMock())
+_stub("googleapiclient.http", MediaIoBaseUpload=MagicMock(), build_http=MagicMock())
+_stub("googleapiclient.errors", HttpError=HttpError)
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+
+import drive_api  # noqa: E402
+from drive_api import GoogleDriveAPI  # noqa: E402
+
+
+def make_api(folder_cache=None):
+    """GoogleDriveAPI with a MagicMock service and no authentication"""
+    api = GoogleDriveAPI.__new__(GoogleDriveAPI)
+    api.creds = None
+    api._local = threading.local()
+    api._local.service = MagicMock()
+    api._folder_cache = dict(folder_cache or {})
+    api._folder_lock = threading.RLock()
+    return api
+
+
+class FakeBatch:
+    """new_batch_http_request() stand-in that answers each request via respond()"""
+
+    def __init__(self, callback, respond):
+        self.callback = callback
+        self.respond = respond
+        self.requests = []
+
+    def add(self, request, request_id):
+        self.requests.append((request_id, request))
+
+    def execute(self):
+        for request_id, request in self.requests:
+            try:
+                self.callback(request_id, self.respond(request), None)
+            except HttpError as e:
+                self.callback(request_id, None, e)
+
+
+class TestFindOrCreateFolders(unittest.TestCase):
+
+    def setUp(self):
+        patcher = patch.object(drive_api, "save_cache")
+        self.save_cache = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def respond(self, request):
+        kind, value = request
+        if kind == "list":
+            if "Broken" in value:
+                raise HttpError(500)
+            if "Existing" in value:
+                return {"files": [{"id": "existing-id"}]}
+            return {"files": []}
+        return {"id": f"new-{value}"}
+
+    def attach_batches(self, api):
+        files = api.service.files.return_value
+        files.list.side_effect = lambda q, **kw: ("list", q)
+        files.create.side_effect = lambda body, **kw: ("create", body["name"])
+        self.batches = []
+
+        def new_batch(callback):
+            batch = FakeBatch(callback, self.respond)
+            self.batches.append(batch)
+            return batch
+        api.service.new_batch_http_request.side_effect = new_batch
+
+    def test_cached_found_created_and_failed(self):
+        cached_key = json.dumps(["parent", ["Cached"]])
+        api = make_api({cached_key: "cached-id"})
+        self.attach_batches(api)
+
+        ids = api.find_or_create_folders(
+            [["Cached"], ["Existing", None], ["Fresh"], ["Broken"]], "parent"
+        )
+
+        self.assertEqual(ids, ["cached-id", "existing-id", "new-Fresh", None])
+        # One lookup batch for the three uncached folders, one create batch
+        lookups, creates = self.batches
+        self.assertEqual(len(lookups.requests), 3)
+        self.assertEqual([r for _, r in creates.requests], [("create", "Fresh")])
+        # A failed lookup is neither created nor cached, so it is retried later
+        self.assertNotIn(json.dumps(["parent", ["Broken"]]), api._folder_cache)
+        self.assertEqual(api._folder_cache[json.dumps(["parent", ["Existing"]])], "existing-id")
+        self.save_cache.assert_called_once()
+
+    def test_all_cached_makes_no_requests(self):
+        api = make_api({json.dumps(["parent", ["Cached"]]): "cached-id"})
+        self.attach_batches(api)
+
+        self.assertEqual(api.find_or_create_folders([["Cached"]], "parent"), ["cached-id"])
+        api.service.new_batch_http_request.assert_not_called()
+        self.save_cache.assert_not_called()
+
+
+MiB = 1024 * 1024
+
+
+class FakeMedia:
+    """MediaIoBaseUpload stand-in exposing the chunk size the way adapt_chunk_size uses it"""
+
+    def __init__(self, chunksize):
+        self._chunksize = chunksize
+
+    def chunksize(self):
+        return self._chunksize
+
+
+class TestExecuteResumable(unittest.TestCase):
+
+    def setUp(self):
+        for target in ("save_cache", "time"):
+            patcher = patch.object(drive_api, target)
+            setattr(self, target, patcher.start())
+            self.addCleanup(patcher.stop)
+        self.time.monotonic.return_value = 0.0
+        self.request = MagicMock()
+        self.request.resumable = FakeMedia(8 * MiB)
+
+    def test_retries_transient_error_then_succeeds(self):
+        self.request.next_chunk.side_effect = [HttpError(503), (None, {"id": "f"})]
+
+        self.assertEqual(make_api()._execute_resumable(self.request), {"id": "f"})
+        self.assertEqual(self.request.next_chunk.call_count, 2)
+        self.time.sleep.assert_called_once_with(2)
+        self.save_cache.assert_called_once_with(drive_api._TUNING_CACHE, {"chunk_size": 8 * MiB})
+
+    def test_non_retryable_error_raises(self):
+        self.request.next_chunk.side_effect = HttpError(403)
+
+        with self.assertRaises(HttpError):
+            make_api()._execute_resumable(self.request)
+        self.assertEqual(self.request.next_chunk.call_count, 1)
+        self.time.sleep.assert_not_called()
+        self.save_cache.assert_not_called()
+
+    def test_gives_up_after_upload_retries(self):
+        self.request.next_chunk.side_effect = OSError("reset")
+
+        with self.assertRaises(OSError):
+            make_api()._execute_resumable(self.request)
+        self.assertEqual(self.request.next_chunk.call_count, drive_api.UPLOAD_RETRIES + 1)
+
+    def test_streamed_upload_does_not_adapt_or_save(self):
+        self.request.resumable = FakeMedia(-1)
+        self.request.next_chunk.return_value = (None, {"id": "f"})
+
+        make_api()._execute_resumable(self.request)
+        self.save_cache.assert_not_called()
+
+
+class TestChunkSize(unittest.TestCase):
+
+    def test_adapt_doubles_fast_and_halves_slow_chunks(self):
+        cases = [
+            (8 * MiB, 1, 16 * MiB),
+            (8 * MiB, 40, 4 * MiB),
+            (8 * MiB, 20, 8 * MiB),
+            # Clamped to [256 KiB, 64 MiB]
+            (64 * MiB, 1, 64 * MiB),
+            (256 * 1024, 40, 256 * 1024),
+        ]
+        for start, elapsed, expected in cases:
+            media = FakeMedia(start)
+            self.assertEqual(drive_api.adapt_chunk_size(media, elapsed), expected)
+            self.assertEqual(media.chunksize(), expected)
+
+    def test_configured_prefers_env_then_cache_then_default(self):
+        learned = {"chunk_size": 4 * MiB}
+        with patch.object(drive_api, "load_cache", return_value=learned):
+            with patch.dict(os.environ, {"DRIVE_CHUNK_SIZE": str(3 * MiB + 1)}):
+                self.assertEqual(drive_api._configured_chunk_size(), 3 * MiB)
+            with patch.dict(os.environ, {"DRIVE_CHUNK_SIZE": "lots"}):
+                self.assertEqual(drive_api._configured_chunk_size(), 4 * MiB)
+            with patch.dict(os.environ, {"DRIVE_CHUNK_SIZE": ""}):
+                self.assertEqual(drive_api._configured_chunk_size(), 4 * MiB)
+        with patch.object(drive_api, "load_cache", return_value=None), \
+                patch.dict(os.environ, {"DRIVE_CHUNK_SIZE": ""}):
+            self.assertEqual(drive_api._configured_chunk_size(), drive_api.DEFAULT_CHUNK_SIZE)
+
+
+class TestUploadFile(unittest.TestCase):
+
+    def upload(self, size):
+        """Upload a fake file of `size` bytes; returns (chunksize, resumable, api)"""
+        api = make_api()
+        api._execute_resumable = MagicMock(return_value={"name": "v.mp4"})
+        api.service.files.return_value.create.return_value.execute.return_value = {"name": "v.mp4"}
+        real_stat = os.stat
+
+        def fake_stat(path, *args, **kwargs):
+            if path == "/tmp/v.mp4":
+                return types.SimpleNamespace(st_size=size)
+            return real_stat(path, *args, **kwargs)
+
+        with patch.object(drive_api.os, "stat", side_effect=fake_stat), \
+                patch("builtins.open", mock_open()), \
+                patch.object(drive_api, "_configured_chunk_size", return_value=32 * MiB), \
+                patch.object(drive_api, "MediaIoBaseUpload") as media_cls:
+            self.assertEqual(api.upload_file("/tmp/v.mp4", "folder"), {"name": "v.mp4"})
+        kwargs = media_cls.call_args.kwargs
+        return kwargs["chunksize"], kwargs["resumable"], api
+
+    def test_upload_path_at_each_size_boundary(self):
+        cases = [
+            (drive_api.SIMPLE_UPLOAD_LIMIT - 1, drive_api.DEFAULT_CHUNK_SIZE, False),
+            (drive_api.SIMPLE_UPLOAD_LIMIT, -1, True),
+            (drive_api.STREAM_UPLOAD_LIMIT - 1, -1, True),
+            (drive_api.STREAM_UPLOAD_LIMIT, 32 * MiB, True),
+        ]
+        for size, chunksize, resumable in cases:
+            with self.subTest(size=size):
+                got_chunksize, got_resumable, api = self.upload(size)
+                self.assertEqual((got_chunksize, got_resumable), (chunksize, resumable))
+                self.assertEqual(api._execute_resumable.called, resumable)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,67 @@
+"""
+Tests for SiteDetector URL classification.
+
+site_detector has no third-party imports, so nothing needs stubbing.
+"""
+
+import sys
+import os
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+
+from site_detector import SiteDetector  # noqa: E402
+
+
+class TestDetectSite(unittest.TestCase):
+
+    def test_aliases_and_subdomains(self):
+        cases = {
+            "https://www.youtube.com/@handle": "youtube.com",
+            "https://m.youtube.com/watch?v=abc": "youtube.com",
+            "https://youtu.be/abc": "youtube.com",
+            "https://vm.tiktok.com/ZMabc/": "tiktok.com",
+            "https://x.com/user/status/1": "twitter.com",
+            "https://open.spotify.com/album/1": "spotify.com",
+        }
+        for url, key in cases.items():
+            self.assertEqual(SiteDetector.detect_site(url)['key'], key, url)
+
+    def test_scheme_less_and_mixed_case(self):
+        self.assertEqual(SiteDetector.detect_site("youtube.com/watch?v=abc")['key'], "youtube.com")
+        self.assertEqual(SiteDetector.detect_site("HTTPS://WWW.TikTok.com:443/@u")['key'], "tiktok.com")
+
+    def test_alias_only_matches_whole_domain_labels(self):
+        # "x.com" must not match netflix.com, nor a domain mentioned in the query
+        self.assertEqual(SiteDetector.detect_site("https://netflix.com/title/1")['key'], "generic")
+        self.assertEqual(SiteDetector.detect_site("https://example.com/?u=youtube.com")['key'], "generic")
+
+    def test_empty_url_is_generic(self):
+        self.assertEqual(SiteDetector.detect_site("")['key'], "generic")
+
+    def test_site_info_is_shared_and_read_only(self):
+        info = SiteDetector.detect_site("https://youtu.be/abc")
+        self.assertIs(info, SiteDetector.detect_site("https://www.youtube.com/@h"))
+        self.assertNotIn('aliases', info)
+        with self.assertRaises(TypeError):
+            info['name'] = 'Other'
+
+
+class TestUrlType(unittest.TestCase):
+
+    def test_is_bulk_url(self):
+        self.assertTrue(SiteDetector.is_bulk_url("https://www.youtube.com/@Handle/shorts"))
+        self.assertTrue(SiteDetector.is_bulk_url("https://youtube.com/PLAYLIST?list=PL1"))
+        self.assertFalse(SiteDetector.is_bulk_url("https://youtu.be/abc"))
+
+    def test_get_url_type_priority(self):
+        self.assertEqual(SiteDetector.get_url_type("https://youtube.com/watch?v=a&list=PL1"), "playlist")
+        # Playlist wins even when a channel marker appears first
+        self.assertEqual(SiteDetector.get_url_type("https://youtube.com/@h/playlists"), "playlist")
+        self.assertEqual(SiteDetector.get_url_type("https://youtube.com/channel/UC1"), "channel")
+        self.assertEqual(SiteDetector.get_url_type("https://example.com/album/1"), "album")
+        self.assertEqual(SiteDetector.get_url_type("https://youtu.be/abc"), "single")
+
+
+if __name__ == "__main__":
+    unittest.main(verbosity=2)
@@ -13,6 +13,9 @@ Invariants verified:
 
 import sys
 import os
+import io
+import contextlib
+import threading
 import types
 import importlib
 import unittest
@@ -247,5 +250,67 @@ class TestSmartBatchCounting(unittest.TestCase):
         self.assertEqual(f, 1)   # URL2 (all failed)
 
 
+class TestPipeline(unittest.TestCase):
+    """The download/upload stages main() runs across its worker pools."""
+
+    def test_fetch_url_defers_upload(self):
+        dl = MagicMock()
+        job = {'file': '/tmp/x.mp4'}
+        dl.fetch.return_value = (True, "Downloaded: x", job)
+        self.assertEqual(sb.fetch_url(FAKE_URL_YT, dl, None, "FOLDER"), (True, job))
+        dl.upload.assert_not_called()
+
+        dl.upload.return_value = (False, "Upload to Drive failed")
+        self.assertFalse(sb.upload_job(dl, job))
+        dl.upload.assert_called_once_with(job)
+
+    def test_fetch_url_duplicate_needs_no_upload(self):
+        dl = MagicMock()
+        dl.fetch.return_value = (True, "Already in history: x", None)
+        self.assertEqual(sb.fetch_url(FAKE_URL_YT, dl, None, "FOLDER"), (True, None))
+
+    def test_main_counts_results_and_releases_staging_slots(self):
+        urls = [f"https://www.youtube.com/watch?v={v}" for v in "abcde"]
+        fetched = {
+            "a": (True, "Already in history: a", None),
+            "b": (True, "Downloaded: b", {"id": "b"}),
+            "c": (True, "Downloaded: c", {"id": "c"}),
+            "d": (False, "std-fail", None),
+        }
+
+        def fetch(url):
+            video = url[-1]
+            if video == "e":
+                raise RuntimeError("boom")
+            return fetched[video]
+
+        def upload(job):
+            if job["id"] == "c":
+                raise RuntimeError("upload boom")
+            return True, "Uploaded"
+
+        dl = MagicMock(**{"fetch.side_effect": fetch, "upload.side_effect": upload})
+        semaphores = []
+        real_semaphore = threading.BoundedSemaphore
+
+        def make_semaphore(value):
+            semaphores.append((real_semaphore(value), value))
+            return semaphores[-1][0]
+
+        out = io.StringIO()
+        with patch.object(sys, "argv", ["smart_batch.py", "https://www.youtube.com/@h", "5", "FOLDER"]), \
+                patch.object(sb, "extract_standard", return_value=urls), \
+                patch.object(sb, "SimplifiedDownloader", return_value=dl), \
+                patch.object(sb, "PLAYWRIGHT_AVAILABLE", False), \
+                patch.object(sb.threading, "BoundedSemaphore", side_effect=make_semaphore), \
+                contextlib.redirect_stdout(out):
+            self.assertEqual(sb.main(), 0)
+
+        self.assertIn("Completed: 2 success, 3 failed", out.getvalue())
+        (staged, size), = semaphores
+        # Every slot came back: all of them can be taken again
+        self.assertTrue(all(staged.acquire(blocking=False) for _ in range(size)))
+
+
 if __name__ == "__main__":
     unittest.main(verbosity=2)
@@ -0,0 +1,99 @@
+"""
+Tests for storage_utils disk-space helpers.
+
+The platform's disk-usage call is patched so results are deterministic.
+"""
+
+import sys
+import os
+import unittest
+from collections import namedtuple
+from unittest.mock import patch
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+
+import storage_utils  # noqa: E402
+
+GB = 1024 ** 3
+StatVFS = namedtuple("StatVFS", "f_frsize f_blocks f_bfree f_bavail")
+Usage = namedtuple("Usage", "total used free")
+
+
+# storage_utils reads statvfs() directly where it exists
+DISK_CALL = "os.statvfs" if hasattr(os, "statvfs") else "shutil.disk_usage"
+
+
+def disk(total, used, free):
+    """Patch DISK_CALL to report the given total/used/free bytes"""
+    if DISK_CALL == "os.statvfs":
+        block = 4096
+        return patch(DISK_CALL, return_value=StatVFS(block, total // block, free // block, free // block))
+    return patch(DISK_CALL, return_value=Usage(total, used, free))
+
+
+class TestCheckDiskSpace(unittest.TestCase):
+
+    def setUp(self):
+        storage_utils.reset_caches()
+
+    def test_reports_gb_and_threshold(self):
+        with disk(100 * GB, 80 * GB, 20 * GB):
+            self.assertEqual(storage_utils.check_disk_space("/", min_gb=10), (True, 20.0, 80.0, 100.0))
+            self.assertFalse(storage_utils.check_disk_space("/", min_gb=50)[0])
+
+    def test_results_are_cached_until_cleared(self):
+        with disk(100 * GB, 80 * GB, 20 * GB) as du:
+            storage_utils.check_disk_space("/")
+            storage_utils.check_disk_space("/")
+            self.assertEqual(du.call_count, 1)
+            storage_utils.reset_caches()
+            storage_utils.check_disk_space("/")
+            self.assertEqual(du.call_count, 2)
+
+    def test_errors_are_not_cached(self):
+        with patch(DISK_CALL, side_effect=OSError("gone")):
+            self.assertEqual(storage_utils.check_disk_space("/missing"), (False, 0.0, 0.0, 0.0))
+        with disk(10 * GB, 5 * GB, 5 * GB):
+            self.assertEqual(storage_utils.check_disk_space("/missing", min_gb=1)[1], 5.0)
+
+
+class TestGetStorageStats(unittest.TestCase):
+
+    def setUp(self):
+        storage_utils.reset_caches()
+
+    def test_status_thresholds(self):
+        expected = {4: "critical", 5: "warning", 20: "moderate", 50: "good"}
+        for free, status in expected.items():
+            storage_utils.reset_caches()
+            with disk(100 * GB, (100 - free) * GB, free * GB):
+                self.assertEqual(storage_utils.get_storage_stats()['status'], status, free)
+
+    def test_result_is_shared_and_read_only(self):
+        with disk(100 * GB, 80 * GB, 20 * GB):
+            stats = storage_utils.get_storage_stats()
+            self.assertIs(stats, storage_utils.get_storage_stats())
+        self.assertEqual(stats['percent_used'], 80.0)
+        self.assertEqual(storage_utils.format_storage_display(stats),
+                         "🟢 Storage: 20.0GB free / 100.0GB (80% used)")
+        with self.assertRaises(TypeError):
+            stats['status'] = 'good'
+
+
+class TestGetStorageDisplay(unittest.TestCase):
+
+    def setUp(self):
+        storage_utils.reset_caches()
+
+    def test_matches_formatted_stats(self):
+        for free in (3, 20, 80):
+            storage_utils.reset_caches()
+            with disk(100 * GB, (100 - free) * GB, free * GB):
+                self.assertEqual(
+                    storage_utils.get_storage_display(),
+                    storage_utils.format_storage_display(storage_utils.get_storage_stats()),
+                )
+
+
+if __name__ == "__main__":
+    unittest.main(verbosity=2)
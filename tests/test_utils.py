@@ -0,0 +1,69 @@
+"""
+Tests for utils.detect_google_drive fast paths and the user-agent pool.
+
+The ~/.omnistream cache helpers are patched so nothing outside a temp dir
+is read or written.
+"""
+
+import sys
+import os
+import tempfile
+import unittest
+from unittest.mock import patch
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+
+import utils  # noqa: E402
+
+
+class TestDetectGoogleDrive(unittest.TestCase):
+
+    def setUp(self):
+        utils._RESOLVED_DRIVE = None
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.addCleanup(setattr, utils, "_RESOLVED_DRIVE", None)
+
+    def test_env_override_skips_probing(self):
+        with patch.dict(os.environ, {"OMNISTREAM_DRIVE_PATH": self.tmp.name}), \
+                patch.object(utils, "_candidates") as candidates:
+            self.assertEqual(utils.detect_google_drive(), (True, self.tmp.name))
+        candidates.assert_not_called()
+
+    def test_cached_path_is_reused_while_it_exists(self):
+        cached = {"is_connected": True, "base_path": self.tmp.name}
+        with patch.dict(os.environ, {"OMNISTREAM_DRIVE_PATH": ""}), \
+                patch.object(utils, "load_cache", return_value=cached), \
+                patch.object(utils, "_candidates") as candidates:
+            self.assertEqual(utils.detect_google_drive(), (True, self.tmp.name))
+        candidates.assert_not_called()
+
+    def test_stale_cache_falls_back_to_probe(self):
+        cached = {"is_connected": True, "base_path": os.path.join(self.tmp.name, "gone")}
+        fallback = os.path.join(self.tmp.name, "local")
+        with patch.dict(os.environ, {"OMNISTREAM_DRIVE_PATH": ""}), \
+                patch.object(utils, "load_cache", return_value=cached), \
+                patch.object(utils, "_candidates", return_value=iter(())), \
+                patch("os.path.expanduser", return_value=fallback):
+            self.assertEqual(utils.detect_google_drive(), (False, fallback))
+
+
+class TestRandomUserAgent(unittest.TestCase):
+
+    def setUp(self):
+        utils._UA_POOL = None
+        self.addCleanup(setattr, utils, "_UA_POOL", None)
+
+    def test_pool_built_once_with_fallback(self):
+        with patch.object(utils, "_build_ua_pool", return_value=utils._DEFAULT_USER_AGENTS) as build:
+            agents = {utils.random_user_agent() for _ in range(20)}
+        build.assert_called_once()
+        self.assertLessEqual(agents, set(utils._DEFAULT_USER_AGENTS))
+
+    def test_missing_fake_useragent_uses_defaults(self):
+        with patch.dict("sys.modules", {"fake_useragent": None}):
+            self.assertEqual(utils._build_ua_pool(), utils._DEFAULT_USER_AGENTS)
+
+
+if __name__ == "__main__":
+    unittest.main(verbosity=2)
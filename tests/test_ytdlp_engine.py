@@ -0,0 +1,401 @@
+"""
+Tests for YtDlpEngine helpers.
+
+yt_dlp and fake_useragent are stubbed; YoutubeDL is replaced per test with
+a MagicMock class so no network or downloads happen.
+"""
+
+import sys
+import os
+import tempfile
+import threading
+import types
+import unittest
+from unittest.mock import MagicMock, patch
+
+# ---------------------------------------------------------------------------
+# Stub heavy optional packages
+# ---------------------------------------------------------------------------
+
+sys.modules.setdefault("yt_dlp", types.ModuleType("yt_dlp"))
+ua_stub = types.ModuleType("fake_useragent")
+ua_stub.UserAgent = MagicMock(return_value=MagicMock(random="FakeAgent/1.0"))
+sys.modules.setdefault("fake_useragent", ua_stub)
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+
+import ytdlp_engine  # noqa: E402
+from ytdlp_engine import YtDlpEngine  # noqa: E402
+
+
+def fake_ydl_class():
+    """YoutubeDL stand-in whose instances keep a real params dict"""
+    def make(opts):
+        ydl = MagicMock()
+        ydl.params = {**opts, 'outtmpl': {'default': opts.get('outtmpl')}}
+        return ydl
+    return MagicMock(side_effect=make)
+
+
+class TestYoutubeDLPool(unittest.TestCase):
+
+    def setUp(self):
+        self.engine = YtDlpEngine("/tmp/out")
+        patcher = patch.object(ytdlp_engine.yt_dlp, "YoutubeDL", fake_ydl_class(), create=True)
+        self.YoutubeDL = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_instance_reused_with_new_outtmpl(self):
+        with self.engine._ydl({'quiet': True, 'outtmpl': 'a/%(id)s'}) as first:
+            pass
+        with self.engine._ydl({'quiet': True, 'outtmpl': 'b/%(id)s'}) as second:
+            self.assertIs(first, second)
+            self.assertEqual(second.params['outtmpl']['default'], 'b/%(id)s')
+        self.assertEqual(self.YoutubeDL.call_count, 1)
+
+    def test_concurrent_borrows_and_other_options_get_own_instance(self):
+        with self.engine._ydl({'quiet': True}) as first, \
+                self.engine._ydl({'quiet': True}) as second:
+            self.assertIsNot(first, second)
+        with self.engine._ydl({'quiet': False}) as third:
+            self.assertNotIn(third, (first, second))
+
+    def test_close_closes_pooled_instances(self):
+        with self.engine._ydl({'quiet': True}) as ydl:
+            pass
+        self.engine.close()
+        ydl.close.assert_called_once()
+        with self.engine._ydl({'quiet': True}) as fresh:
+            self.assertIsNot(fresh, ydl)
+
+    def test_instance_borrowed_during_close_is_closed_on_return(self):
+        with self.engine._ydl({'quiet': True}) as borrowed:
+            self.engine.close()
+            borrowed.close.assert_not_called()
+        borrowed.close.assert_called_once()
+        with self.engine._ydl({'quiet': True}) as fresh:
+            self.assertIsNot(fresh, borrowed)
+
+    def test_session_user_agent_rotates_and_drops_pool(self):
+        with patch.object(ytdlp_engine, "random_user_agent", side_effect=["UA1", "UA2"]), \
+                patch.object(ytdlp_engine.random, "randint", return_value=2), \
+                patch.object(self.engine, "close") as close:
+            agents = [self.engine._session_user_agent() for _ in range(3)]
+        self.assertEqual(agents, ["UA1", "UA1", "UA2"])
+        self.assertEqual(close.call_count, 2)
+
+
+class TestUrlClassification(unittest.TestCase):
+
+    def setUp(self):
+        self.engine = YtDlpEngine("/tmp/out")
+
+    def test_is_bulk_operation(self):
+        self.assertTrue(self.engine._is_bulk_operation("https://www.youtube.com/@Handle/shorts"))
+        self.assertTrue(self.engine._is_bulk_operation("https://youtube.com/PLAYLIST?list=PL1"))
+        self.assertFalse(self.engine._is_bulk_operation("https://youtu.be/abc"))
+
+    def test_detect_platform(self):
+        cases = {
+            "https://m.YouTube.com/watch?v=a": "YouTube",
+            "https://youtu.be/a": "YouTube",
+            "https://www.tiktok.com/@u/video/1": "TikTok",
+            "https://instagram.com/p/1": "Instagram",
+            "https://x.com/u/status/1": "Twitter",
+            "https://www.netflix.com/title/1": "Generic_Sites/netflix.com",
+        }
+        for url, platform in cases.items():
+            self.assertEqual(self.engine._detect_platform(url), platform, url)
+
+
+class TestUrlVideoId(unittest.TestCase):
+
+    def test_known_platform_skips_full_scan(self):
+        extractor = MagicMock()
+        extractor.get_info_extractor.return_value.suitable.return_value = True
+        extractor.get_info_extractor.return_value.get_temp_id.return_value = "abc"
+        with patch.object(ytdlp_engine.yt_dlp, "extractor", extractor, create=True):
+            self.assertEqual(ytdlp_engine._url_video_id("https://www.tiktok.com/@u/video/abc"), "abc")
+        extractor.get_info_extractor.assert_called_once_with("TikTok")
+        extractor.gen_extractor_classes.assert_not_called()
+
+    def test_unmatched_url_falls_back_to_scan(self):
+        extractor = MagicMock()
+        extractor.get_info_extractor.return_value.suitable.return_value = False
+        generic = MagicMock(**{"suitable.return_value": True, "get_temp_id.return_value": "xyz"})
+        extractor.gen_extractor_classes.return_value = [generic]
+        with patch.object(ytdlp_engine.yt_dlp, "extractor", extractor, create=True):
+            self.assertEqual(ytdlp_engine._url_video_id("https://youtube.com/watch?v=a&list=PL1"), "xyz")
+
+
+class TestFinalPath(unittest.TestCase):
+
+    def test_prefers_requested_downloads_filepath(self):
+        info = {'requested_downloads': [{'_filename': '/t/a.f137.mp4', 'filepath': '/t/a.mp4'}]}
+        self.assertEqual(YtDlpEngine._final_path(info), '/t/a.mp4')
+        self.assertEqual(YtDlpEngine._final_path({'_filename': '/t/b.webm'}), '/t/b.webm')
+        self.assertIsNone(YtDlpEngine._final_path({}))
+
+
+class TestSkipDownloaded(unittest.TestCase):
+
+    def test_known_ids_are_filtered(self):
+        engine = YtDlpEngine("/tmp/out")
+        history = MagicMock()
+        history.is_downloaded.side_effect = lambda video_id: video_id == "old"
+        with patch.object(ytdlp_engine, "get_history", return_value=history):
+            self.assertIn("old", engine._skip_downloaded({'id': 'old'}, incomplete=True))
+            self.assertIsNone(engine._skip_downloaded({'id': 'new'}, incomplete=True))
+            self.assertIsNone(engine._skip_downloaded({}, incomplete=True))
+        self.assertEqual(history.is_downloaded.call_count, 2)
+
+    def test_files_under_output_path_count_as_downloaded(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        os.makedirs(os.path.join(tmp.name, "Creator"))
+        names = ("My_Clip_ab_cd123456.mp4", "Tok_7300000000000000001.m4a", "Other_zz9zz9zz9zz.mp4.part",
+                 "Part_2.mp4", "My_Clip_12345.jpg", "Thumb_cd_ef123456.webp")
+        for name in names:
+            open(os.path.join(tmp.name, "Creator", name), "w").close()
+        engine = YtDlpEngine(tmp.name)
+        self.assertEqual(engine._local_ids(), {"ab_cd123456", "7300000000000000001"})
+
+    def test_deleted_files_stop_counting_on_next_download(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        os.makedirs(os.path.join(tmp.name, "Creator"))
+        path = os.path.join(tmp.name, "Creator", "Clip_abcdefghijk.mp4")
+        open(path, "w").close()
+        engine = YtDlpEngine(tmp.name)
+        self.assertIn("abcdefghijk", engine._local_ids())
+        os.unlink(path)
+        self.assertIn("abcdefghijk", engine._local_ids())  # unchanged until the next download()
+        engine._local_ids_stale = True
+        self.assertNotIn("abcdefghijk", engine._local_ids())
+
+
+class TestProgressHook(unittest.TestCase):
+
+    def test_payload_reused_and_missing_fields_defaulted(self):
+        seen = []
+        engine = YtDlpEngine("/tmp/out", progress_callback=lambda p: seen.append(dict(p)))
+        engine._progress_hook({'status': 'downloading', '_percent_str': ' 5.0%', 'filename': '/tmp/a/v.mp4'})
+        engine._progress_hook({'status': 'downloading'})
+        self.assertEqual(seen[0], {'percentage': '5.0%', 'speed': 'N/A', 'eta': 'N/A', 'filename': 'v.mp4'})
+        self.assertEqual(seen[1]['filename'], 'Unknown')
+
+    def test_rapid_ticks_are_dropped_except_completion(self):
+        seen = []
+        engine = YtDlpEngine("/tmp/out", progress_callback=lambda p: seen.append(p['percentage']))
+        tick = {'status': 'downloading', 'filename': '/tmp/a/v.mp4'}
+        with patch.object(ytdlp_engine.time, "monotonic", side_effect=[10.0, 10.1, 10.2, 10.5]):
+            for percent in ('1%', '2%', '100%', '3%'):
+                engine._progress_hook({**tick, '_percent_str': percent})
+        self.assertEqual(seen, ['1%', '100%', '3%'])
+
+    def test_interleaved_files_are_throttled_separately(self):
+        seen = []
+        engine = YtDlpEngine("/tmp/out", progress_callback=lambda p: seen.append((p['filename'], p['percentage'])))
+        ticks = [("a.mp4", "1%"), ("b.mp4", "1%"), ("a.mp4", "2%"), ("b.mp4", "2%"),
+                 ("a.mp4", "3%"), ("b.mp4", "3%")]
+        with patch.object(ytdlp_engine.time, "monotonic", side_effect=[10.0, 10.05, 10.1, 10.15, 10.3, 10.35]):
+            for name, percent in ticks:
+                engine._progress_hook({'status': 'downloading', 'filename': name, '_percent_str': percent})
+        self.assertEqual(seen, [("a.mp4", "1%"), ("b.mp4", "1%"), ("a.mp4", "3%"), ("b.mp4", "3%")])
+
+
+class TestLog(unittest.TestCase):
+
+    def test_busy_callback_does_not_block_other_threads(self):
+        seen = []
+        entered, release = threading.Event(), threading.Event()
+
+        def callback(message, level):
+            if message == "slow":
+                entered.set()
+                release.wait(5)
+            seen.append((message, level))
+
+        engine = YtDlpEngine("/tmp/out", log_callback=callback)
+        first = threading.Thread(target=engine.log, args=("slow",))
+        first.start()
+        entered.wait(5)
+        second = threading.Thread(target=engine.log, args=("queued", "WARNING"))
+        second.start()
+        second.join(5)
+        self.assertFalse(second.is_alive())
+        release.set()
+        first.join(5)
+        self.assertEqual(seen, [("slow", "INFO"), ("queued", "WARNING")])
+
+
+class TestDownloadBulkDrive(unittest.TestCase):
+
+    def test_downloads_hand_off_to_uploader(self):
+        engine = YtDlpEngine("/tmp/out", max_workers=2)
+        engine.use_drive_api, engine.drive_api = True, MagicMock()
+        entries = [{"id": v, "url": f"https://www.youtube.com/watch?v={v}"} for v in "abc"]
+        ydl = MagicMock()
+        ydl.extract_info.return_value = {"entries": entries}
+        engine._ydl = MagicMock()
+        engine._ydl.return_value.__enter__.return_value = ydl
+
+        def download_one(url, opts, info=None, on_downloaded=None):
+            on_downloaded({"id": url[-1]}, "/tmp/none")
+            return True, "Downloaded"
+
+        uploaded = []
+        engine._download_one = download_one
+        engine._upload_to_drive = lambda info, temp_dir: (uploaded.append(info["id"]) or info["id"] != "b", "")
+        with patch.object(ytdlp_engine, "get_history") as history, \
+                patch.object(ytdlp_engine.time, "sleep"):
+            history.return_value.is_downloaded.return_value = False
+            ok, message = engine._download_bulk("https://www.youtube.com/@h", {})
+        self.assertTrue(ok)
+        self.assertEqual(sorted(uploaded), ["a", "b", "c"])
+        self.assertEqual(message, "Downloaded 2/3 videos (1 failed)")
+
+    def test_channel_tabs_are_expanded_into_videos(self):
+        engine = YtDlpEngine("/tmp/out")
+        watch = "https://www.youtube.com/watch?v="
+        tabs = [
+            {"_type": "playlist", "webpage_url": "https://www.youtube.com/@h/videos",
+             "entries": [{"id": "a", "url": watch + "a"}, {"id": "b", "url": watch + "b"}]},
+            {"_type": "playlist", "webpage_url": "https://www.youtube.com/@h/streams",
+             "entries": [{"id": "b", "url": watch + "b"}, {"id": "c", "url": watch + "c"}]},
+        ]
+        ydl = MagicMock()
+        ydl.extract_info.return_value = {"_type": "playlist", "entries": tabs}
+        engine._ydl = MagicMock()
+        engine._ydl.return_value.__enter__.return_value = ydl
+        fetched = []
+        engine._download_one = lambda url, opts, info=None, on_downloaded=None: (fetched.append(info["id"]) or True, "")
+        with patch.object(ytdlp_engine.time, "sleep"):
+            ok, message = engine._download_bulk("https://www.youtube.com/@h", {})
+        self.assertEqual(sorted(fetched), ["a", "b", "c"])
+        self.assertEqual(message, "Downloaded 3/3 videos")
+
+    def test_first_delay_counts_setup_time(self):
+        engine = YtDlpEngine("/tmp/out", max_workers=1)
+        ydl = MagicMock()
+        ydl.extract_info.return_value = {"entries": [{"url": "https://www.youtube.com/watch?v=a"}]}
+        engine._ydl = MagicMock()
+        engine._ydl.return_value.__enter__.return_value = ydl
+        engine._download_one = lambda url, opts, info=None, on_downloaded=None: (True, "")
+        with patch.object(ytdlp_engine.time, "monotonic", side_effect=[100.0, 104.0, 110.0]), \
+                patch.object(ytdlp_engine.random, "uniform", return_value=10.0), \
+                patch.object(ytdlp_engine.time, "sleep") as sleep:
+            engine._download_bulk("https://www.youtube.com/@h", {})
+        sleep.assert_called_once_with(6.0)
+
+    def test_shorts_only_drops_regular_youtube_entries(self):
+        engine = YtDlpEngine("/tmp/out")
+        entries = [
+            {"ie_key": "Youtube", "url": "https://www.youtube.com/shorts/a"},
+            {"ie_key": "Youtube", "url": "https://www.youtube.com/watch?v=b"},
+            {"ie_key": "TikTok", "url": "https://www.tiktok.com/@u/video/c"},
+        ]
+        ydl = MagicMock()
+        ydl.extract_info.return_value = {"entries": entries}
+        engine._ydl = MagicMock()
+        engine._ydl.return_value.__enter__.return_value = ydl
+        fetched = []
+        engine._download_one = lambda url, opts, info=None, on_downloaded=None: (fetched.append(url) or True, "")
+        with patch.object(ytdlp_engine.time, "sleep"):
+            engine._download_bulk("https://www.youtube.com/@h", {}, shorts_only=True)
+        self.assertEqual(sorted(fetched), sorted([entries[0]["url"], entries[2]["url"]]))
+
+    def test_shorts_only_playlist_drops_only_long_videos(self):
+        engine = YtDlpEngine("/tmp/out")
+        watch = "https://www.youtube.com/watch?v="
+        entries = [
+            {"ie_key": "Youtube", "id": "a", "url": watch + "a", "duration": 45},
+            {"ie_key": "Youtube", "id": "b", "url": watch + "b", "duration": 600},
+            {"ie_key": "Youtube", "id": "c", "url": watch + "c"},
+        ]
+        ydl = MagicMock()
+        ydl.extract_info.return_value = {"webpage_url": "https://www.youtube.com/playlist?list=PL1", "entries": entries}
+        engine._ydl = MagicMock()
+        engine._ydl.return_value.__enter__.return_value = ydl
+        fetched = []
+        engine._download_one = lambda url, opts, info=None, on_downloaded=None: (fetched.append(info["id"]) or True, "")
+        with patch.object(ytdlp_engine.time, "sleep"):
+            engine._download_bulk("https://www.youtube.com/playlist?list=PL1", {}, shorts_only=True)
+        self.assertEqual(sorted(fetched), ["a", "c"])
+
+    def test_shorts_only_channel_root_keeps_shorts_tab(self):
+        tabs = [
+            {"_type": "playlist", "webpage_url": "https://www.youtube.com/@h/videos",
+             "entries": [{"ie_key": "Youtube", "id": "a", "url": "https://www.youtube.com/watch?v=a"}]},
+            {"_type": "playlist", "webpage_url": "https://www.youtube.com/@h/shorts",
+             "entries": [{"ie_key": "Youtube", "id": "b", "url": "https://www.youtube.com/shorts/b"}]},
+        ]
+        videos = [entry for entry, listing in ytdlp_engine._flat_videos(tabs, "https://www.youtube.com/@h")
+                  if ytdlp_engine._may_be_short(entry, listing)]
+        self.assertEqual([entry["id"] for entry in videos], ["b"])
+
+
+class TestDownloadOne(unittest.TestCase):
+
+    def test_filtered_video_is_skipped_without_history(self):
+        engine = YtDlpEngine("/tmp/out")
+        ydl = MagicMock()
+        ydl.process_ie_result.return_value = {"id": "a", "title": "Clip"}
+        engine._ydl = MagicMock()
+        engine._ydl.return_value.__enter__.return_value = ydl
+        with patch.object(ytdlp_engine, "get_history") as history:
+            ok, message = engine._download_one("https://www.youtube.com/watch?v=a", {}, info={"id": "a"})
+        self.assertTrue(ok)
+        self.assertEqual(message, "Skipped: Clip")
+        history.return_value.add_to_history.assert_not_called()
+
+    def test_bulk_counts_skipped_separately(self):
+        engine = YtDlpEngine("/tmp/out")
+        ydl = MagicMock()
+        ydl.extract_info.return_value = {"entries": [{"id": v, "url": v} for v in "abc"]}
+        engine._ydl = MagicMock()
+        engine._ydl.return_value.__enter__.return_value = ydl
+        results = {"a": (True, "Downloaded: A"), "b": (True, "Skipped: B"), "c": (False, "Download failed")}
+        engine._download_one = lambda url, opts, info=None, on_downloaded=None: results[url]
+        with patch.object(ytdlp_engine.time, "sleep"):
+            ok, message = engine._download_bulk("https://www.youtube.com/@h", {})
+        self.assertTrue(ok)
+        self.assertEqual(message, "Downloaded 1/2 videos (1 failed), 1 skipped")
+
+
+class TestSharedTempDir(unittest.TestCase):
+
+    def test_one_dir_per_engine_and_cleanup_per_video(self):
+        engine = YtDlpEngine("/tmp/out")
+        temp_dir = engine._shared_temp_dir()
+        self.addCleanup(ytdlp_engine.shutil.rmtree, temp_dir, True)
+        self.assertEqual(engine._shared_temp_dir(), temp_dir)
+        names = ("Clip_abc.mp4", "Clip_abc.f137.mp4.part", "Clip_abc.webp", "Other_xyz.mp4")
+        for name in names:
+            open(os.path.join(temp_dir, name), "w").close()
+        YtDlpEngine._remove_temp_files(temp_dir, "abc")
+        self.assertEqual(os.listdir(temp_dir), ["Other_xyz.mp4"])
+
+
+class TestPrepareDriveFolders(unittest.TestCase):
+
+    def test_one_batch_per_level(self):
+        engine = YtDlpEngine("/tmp/out", drive_folder_id="BASE")
+        engine.drive_api = MagicMock()
+        engine.drive_api.find_or_create_folders.side_effect = [["YT"], ["C1", "C2"]]
+        infos = [
+            {"webpage_url": "https://www.youtube.com/watch?v=a", "uploader": "Chan: One"},
+            {"webpage_url": "https://www.youtube.com/watch?v=b", "uploader": "Chan: One"},
+            {"webpage_url": "https://www.youtube.com/watch?v=c", "channel": "Two"},
+            {"webpage_url": "https://www.youtube.com/watch?v=d"},
+        ]
+        engine._prepare_drive_folders(infos)
+        calls = engine.drive_api.find_or_create_folders.call_args_list
+        self.assertEqual(calls[0].args, ([["YouTube"]], "BASE"))
+        self.assertEqual(calls[1].args, ([["Chan_ One"], ["Two"], ["Unknown_Creator"]], "YT"))
+        # Same names the upload resolves
+        self.assertEqual(engine._drive_folder_names(infos[0]), ("YouTube", "Chan_ One"))
+
+
+if __name__ == "__main__":
+    unittest.main(verbosity=2)
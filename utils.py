@@ -3,41 +3,87 @@ Utility functions for OmniStream Archiver
 """
 
 import os
+import sys
+import random
+import glob
+import stat
 import logging
 from datetime import datetime
-from typing import Tuple
+from typing import Optional, Tuple
+
+from config_loader import load_cache, save_cache
+
+# Videos downloaded at once by the batch runners and the engine's bulk mode;
+# the scraping rules cap concurrency at 3
+DEFAULT_WORKERS = 3
+
+# Characters invalid in filenames on Windows/macOS, each mapped to '_'
+_SANITIZE_TABLE = str.maketrans({c: '_' for c in '<>:"/\\|?*'})
+
+# Drive mount found by detect_google_drive(); it doesn't move while we run
+_RESOLVED_DRIVE: Optional[str] = None
+# Last resolved base path, so later runs can skip probing mount points
+_DRIVE_CACHE = 'drive_cache.json'
+
+# Fixed Drive mount points, checked after any macOS CloudStorage match
+_DRIVE_PATH_CANDIDATES = (
+    # Windows
+    "G:/My Drive/",
+    "H:/My Drive/",
+    "D:/My Drive/",
+    
+    # macOS (legacy mount points)
+    "/Volumes/GoogleDrive/My Drive/",
+    "/Volumes/Google Drive/My Drive/",
+    
+    # Linux
+    os.path.expanduser("~/Google Drive/"),
+    os.path.expanduser("~/GoogleDrive/"),
+)
+
+
+def _candidates():
+    """Yield Drive mount points in priority order, globbing only when asked"""
+    if sys.platform == 'darwin':
+        # macOS CloudStorage (new Google Drive for Desktop)
+        yield from glob.glob(os.path.expanduser("~/Library/CloudStorage/GoogleDrive-*/My Drive/"))
+    yield from _DRIVE_PATH_CANDIDATES
 
 
 def detect_google_drive() -> Tuple[bool, str]:
     """
     Auto-detect Google Drive for Desktop mount point.
     Check paths in priority order and return first found.
+    OMNISTREAM_DRIVE_PATH, if set to an existing directory, is used as the
+    base path as-is. A successful detection is remembered for the rest of
+    the process and in ~/.omnistream/drive_cache.json for later runs.
     
     Returns:
         (is_connected: bool, base_path: str)
     """
-    import glob
+    global _RESOLVED_DRIVE
+    if _RESOLVED_DRIVE is not None:
+        return True, _RESOLVED_DRIVE
     
-    drive_paths = [
-        # macOS CloudStorage (new Google Drive for Desktop)
-        *glob.glob(os.path.expanduser("~/Library/CloudStorage/GoogleDrive-*/My Drive/")),
-        
-        # Windows
-        "G:/My Drive/",
-        "H:/My Drive/",
-        "D:/My Drive/",
-        
-        # macOS (legacy mount points)
-        "/Volumes/GoogleDrive/My Drive/",
-        "/Volumes/Google Drive/My Drive/",
-        
-        # Linux
-        os.path.expanduser("~/Google Drive/"),
-        os.path.expanduser("~/GoogleDrive/"),
-    ]
+    override = os.environ.get("OMNISTREAM_DRIVE_PATH")
+    if override and os.path.isdir(override):
+        _RESOLVED_DRIVE = override
+        return True, override
     
-    for path in drive_paths:
-        if os.path.exists(path) and os.path.isdir(path):
+    # Reuse the previous run's result while that folder still exists
+    cached = load_cache(_DRIVE_CACHE, {})
+    base_path = cached.get("base_path") if isinstance(cached, dict) else None
+    if base_path and os.path.isdir(base_path):
+        _RESOLVED_DRIVE = base_path
+        return True, base_path
+    
+    for path in _candidates():
+        # One stat answers both "exists" and "is a directory"
+        try:
+            is_dir = stat.S_ISDIR(os.stat(path).st_mode)
+        except OSError:
+            is_dir = False
+        if is_dir:
             # Test write permissions
             try:
                 test_file = os.path.join(path, ".omnistream_test")
@@ -53,6 +99,8 @@ def detect_google_drive() -> Tuple[bool, str]:
                     "Travis"
                 )
                 os.makedirs(base_path, exist_ok=True)
+                _RESOLVED_DRIVE = base_path
+                save_cache(_DRIVE_CACHE, {"is_connected": True, "base_path": base_path})
                 return True, base_path
             except (PermissionError, OSError):
                 # No write permission, try next path
@@ -65,7 +113,10 @@ def detect_google_drive() -> Tuple[bool, str]:
 
 
 def setup_logging(log_dir: str = "logs"):
-    """Configure application logging"""
+    """Configure application logging (only the first call installs handlers)"""
+    if getattr(setup_logging, "_configured", False):
+        return logging.getLogger(__name__)
+    
     os.makedirs(log_dir, exist_ok=True)
     
     log_file = os.path.join(log_dir, f"omnistream_{datetime.now().strftime('%Y%m%d')}.log")
@@ -74,17 +125,49 @@ def setup_logging(log_dir: str = "logs"):
         level=logging.INFO,
         format='%(asctime)s - %(levelname)s - %(message)s',
         handlers=[
-            logging.FileHandler(log_file),
+            # delay: don't open the file until something is actually logged
+            logging.FileHandler(log_file, delay=True),
             logging.StreamHandler()
-        ]
+        ],
+        force=True
     )
+    setup_logging._configured = True
     
     return logging.getLogger(__name__)
 
 
 def sanitize_filename(filename: str) -> str:
     """Remove invalid characters from filename"""
-    invalid_chars = '<>:"/\\|?*'
-    for char in invalid_chars:
-        filename = filename.replace(char, '_')
-    return filename[:255]  # Max filename length
+    return filename.translate(_SANITIZE_TABLE)[:255]  # Max filename length
+
+
+# Used when fake_useragent is missing or can't load its browser data
+_DEFAULT_USER_AGENTS = (
+    'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/124.0.0.0 Safari/537.36',
+    'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/605.1.15 (KHTML, like Gecko) Version/17.4 Safari/605.1.15',
+    'Mozilla/5.0 (Windows NT 10.0; Win64; x64; rv:125.0) Gecko/20100101 Firefox/125.0',
+    'Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/124.0.0.0 Safari/537.36',
+)
+
+
+def _build_ua_pool(size: int = 32) -> tuple:
+    """Sample user agents from fake_useragent once, so callers don't each load its data"""
+    try:
+        from fake_useragent import UserAgent
+        ua = UserAgent()
+        return tuple({ua.random for _ in range(size)}) or _DEFAULT_USER_AGENTS
+    except Exception:
+        return _DEFAULT_USER_AGENTS
+
+
+# Sampled on first use so importing this module doesn't load
+# fake_useragent's browser data
+_UA_POOL = None
+
+
+def random_user_agent() -> str:
+    """Pick a user agent from the pool, building it on the first call"""
+    global _UA_POOL
+    if _UA_POOL is None:
+        _UA_POOL = _build_ua_pool()
+    return random.choice(_UA_POOL)
@@ -33,7 +33,7 @@ def check_folder_access():
         try:
             folder = drive_api.service.files().get(
                 fileId=target_folder_id,
-                fields='id, name, owners, capabilities, permissions',
+                fields='id,name,capabilities(canEdit,canAddChildren)',
                 supportsAllDrives=True
             ).execute()
             
@@ -58,11 +58,9 @@ def check_folder_access():
             
             # Check storage quota
             print(f"\n5. Checking Google Drive storage...")
-            about = drive_api.service.about().get(fields='storageQuota').execute()
-            quota = about.get('storageQuota', {})
+            quota = drive_api.get_storage_quota()
             
-            limit = int(quota.get('limit', 0))
-            usage = int(quota.get('usage', 0))
+            limit, usage = (int(quota.get(k, 0)) for k in ('limit', 'usage'))
             
             if limit > 0:
                 free = limit - usage
@@ -5,9 +5,8 @@ Handles authentication and video uploads to YouTube via API
 """
 
 import os
-import pickle
-from pathlib import Path
-from typing import Optional, Dict, List
+import tempfile
+from typing import Optional, Dict, List, Tuple
 
 from google.auth.transport.requests import Request
 from google.oauth2.credentials import Credentials
@@ -16,6 +15,13 @@ from googleapiclient.discovery import build
 from googleapiclient.errors import HttpError
 from googleapiclient.http import MediaFileUpload
 
+# Videos under this size go up in one non-resumable request
+SIMPLE_UPLOAD_LIMIT = 5 * 1024 * 1024
+# Resumable chunk size; must be a multiple of 256 KiB
+UPLOAD_CHUNK_SIZE = 8 * 1024 * 1024
+# Sub-requests packed into one batch HTTP call by add_to_playlist_batch
+PLAYLIST_BATCH_SIZE = 50
+
 
 class YouTubePoster:
     """Upload videos to YouTube with metadata"""
@@ -48,7 +54,7 @@ class YouTubePoster:
     def __init__(
         self,
         credentials_file: str = 'youtube_credentials.json',
-        token_file: str = 'youtube_token.pickle'
+        token_file: str = 'youtube_token.json'
     ):
         """
         Initialize YouTube poster
@@ -61,6 +67,23 @@ class YouTubePoster:
         self.token_file = token_file
         self.youtube = None
         
+    def _save_token(self, creds: Credentials):
+        """
+        Write credentials as JSON, replacing the token file atomically
+
+        Args:
+            creds: Credentials to persist
+        """
+        token_dir = os.path.dirname(os.path.abspath(self.token_file))
+        fd, tmp_path = tempfile.mkstemp(dir=token_dir, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'w') as token:
+                token.write(creds.to_json())
+            os.replace(tmp_path, self.token_file)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+
     def authenticate(self) -> bool:
         """
         Authenticate with YouTube API using OAuth 2.0
@@ -73,8 +96,10 @@ class YouTubePoster:
         # Check for existing token
         if os.path.exists(self.token_file):
             print("📱 Loading saved YouTube credentials...")
-            with open(self.token_file, 'rb') as token:
-                creds = pickle.load(token)
+            try:
+                creds = Credentials.from_authorized_user_file(self.token_file, self.SCOPES)
+            except ValueError as e:
+                print(f"⚠️  Ignoring unreadable token file: {e}")
         
         # Refresh expired token or get new one
         if not creds or not creds.valid:
@@ -99,8 +124,7 @@ class YouTubePoster:
                 creds = flow.run_local_server(port=0)
             
             # Save credentials for next time
-            with open(self.token_file, 'wb') as token:
-                pickle.dump(creds, token)
+            self._save_token(creds)
             print("✅ Credentials saved")
         
         # Build YouTube service
@@ -141,9 +165,14 @@ class YouTubePoster:
             if not self.authenticate():
                 return None
         
-        if not os.path.exists(filepath):
+        # One stat for both the existence check and the size printout
+        try:
+            st = os.stat(filepath)
+        except FileNotFoundError:
             print(f"❌ Error: File not found: {filepath}")
             return None
+        size_mb = st.st_size / (1024*1024)
+        basename = os.path.basename(filepath)
         
         # Prepare metadata
         body = {
@@ -160,16 +189,18 @@ class YouTubePoster:
             }
         }
         
-        # Create media upload
+        # Create media upload: small files skip the resumable session
+        # round-trip, larger ones go in chunks so progress can be reported
+        resumable = st.st_size >= SIMPLE_UPLOAD_LIMIT
         media = MediaFileUpload(
             filepath,
-            chunksize=-1,  # Upload in single request
-            resumable=True
+            chunksize=UPLOAD_CHUNK_SIZE,
+            resumable=resumable
         )
         
         print(f"\n📤 Uploading to YouTube: {title}")
-        print(f"   File: {Path(filepath).name}")
-        print(f"   Size: {Path(filepath).stat().st_size / (1024*1024):.1f} MB")
+        print(f"   File: {basename}")
+        print(f"   Size: {size_mb:.1f} MB")
         print(f"   Privacy: {privacy}")
         
         try:
@@ -180,12 +211,18 @@ class YouTubePoster:
                 media_body=media
             )
             
-            response = None
-            while response is None:
-                status, response = request.next_chunk()
-                if status:
-                    progress = int(status.progress() * 100)
-                    print(f"   Progress: {progress}%", end='\r')
+            if not resumable:
+                response = request.execute()
+            else:
+                response = None
+                last_progress = -1
+                while response is None:
+                    status, response = request.next_chunk()
+                    if status:
+                        progress = int(status.progress() * 100)
+                        if progress != last_progress:
+                            print(f"   Progress: {progress}%", end='\r')
+                            last_progress = progress
             
             video_id = response['id']
             video_url = f"https://youtube.com/watch?v={video_id}"
@@ -250,24 +287,63 @@ class YouTubePoster:
             return False
         
         try:
-            self.youtube.playlistItems().insert(
-                part='snippet',
-                body={
-                    'snippet': {
-                        'playlistId': playlist_id,
-                        'resourceId': {
-                            'kind': 'youtube#video',
-                            'videoId': video_id
-                        }
-                    }
-                }
-            ).execute()
+            self._playlist_insert(video_id, playlist_id).execute()
             print(f"✅ Video added to playlist {playlist_id}")
             return True
         except Exception as e:
             print(f"❌ Error adding to playlist: {e}")
             return False
     
+    def add_to_playlist_batch(self, pairs: List[Tuple[str, str]]) -> List[bool]:
+        """
+        Add many videos to playlists, up to 50 per batch HTTP call
+        
+        Items within one batch may be inserted in any order, so use
+        add_to_playlist() when playlist position matters.
+        
+        Args:
+            pairs: (video_id, playlist_id) tuples
+            
+        Returns:
+            Success flag per pair, in the same order
+        """
+        results = [False] * len(pairs)
+        if not self.youtube or not pairs:
+            return results
+        
+        def callback(request_id, response, exception):
+            if exception is not None:
+                print(f"❌ Error adding to playlist: {exception}")
+            else:
+                results[int(request_id)] = True
+        
+        for start in range(0, len(pairs), PLAYLIST_BATCH_SIZE):
+            batch = self.youtube.new_batch_http_request(callback=callback)
+            for i, (video_id, playlist_id) in enumerate(pairs[start:start + PLAYLIST_BATCH_SIZE], start):
+                batch.add(self._playlist_insert(video_id, playlist_id), request_id=str(i))
+            try:
+                batch.execute()
+            except Exception as e:
+                print(f"❌ Playlist batch failed: {e}")
+        
+        print(f"✅ Added {sum(results)}/{len(pairs)} videos to playlists")
+        return results
+    
+    def _playlist_insert(self, video_id: str, playlist_id: str):
+        """Build (but don't execute) a playlistItems.insert request"""
+        return self.youtube.playlistItems().insert(
+            part='snippet',
+            body={
+                'snippet': {
+                    'playlistId': playlist_id,
+                    'resourceId': {
+                        'kind': 'youtube#video',
+                        'videoId': video_id
+                    }
+                }
+            }
+        )
+    
     def get_channel_info(self) -> Optional[Dict]:
         """Get authenticated user's channel info"""
         if not self.youtube:
@@ -4,26 +4,257 @@ Enhanced with Shorts-only filter mode
 """
 
 import yt_dlp
+import atexit
 import os
+import re
+import queue
 import random
 import time
 import shutil
 import tempfile
-from datetime import datetime
-from fake_useragent import UserAgent
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from contextlib import contextmanager
+from types import MappingProxyType
 from typing import Callable, Tuple, Optional
+from urllib.parse import urlparse
 from database import get_history
+from utils import DEFAULT_WORKERS, random_user_agent
+from config_loader import CACHE_DIR
+
+# Playlist/channel markers anywhere in the URL
+_BULK_RE = re.compile(r'playlist|channel|/c/|/@|/user/', re.IGNORECASE)
+# One group per platform, in _PLATFORMS order; a domain must start at a
+# label boundary so e.g. netflix.com isn't taken for x.com
+_PLATFORM_RE = re.compile(
+    r'(?<![\w-])(?:(youtube\.com|youtu\.be)|(tiktok\.com)|(instagram\.com)|(twitter\.com|x\.com))',
+    re.IGNORECASE
+)
+# Flat YouTube entries from a channel's tabs link Shorts as /shorts/<id>
+_SHORTS_URL_RE = re.compile(r'/shorts/')
+# Channel pages, as opposed to ?list= playlists (which link Shorts as watch?v=)
+_CHANNEL_LISTING_RE = re.compile(r'youtube\.com/(?:@|channel/|c/|user/)(?![^#]*[?&]list=)', re.IGNORECASE)
+# Prefix of _download_one's message for a video that wasn't downloaded
+SKIPPED = 'Skipped:'
+# Longest video YouTube treats as a Short, in seconds
+SHORTS_MAX_DURATION = 180
+# Files the engine leaves in output_path (merged video or extracted audio)
+_MEDIA_EXTS = frozenset(('.mp4', '.mkv', '.webm', '.m4a', '.mp3'))
+# Trailing "_<id>" of a Title_ID file name: an 11-character YouTube or
+# Instagram ID (which may itself contain '_'), or a numeric TikTok/Twitter ID
+_FILE_ID_RE = re.compile(r'_([A-Za-z0-9_-]{11}|\d{15,20})$')
+_PLATFORMS = ('YouTube', 'TikTok', 'Instagram', 'Twitter')
+# yt-dlp extractor for each of _PLATFORMS' single-video URLs
+_PLATFORM_IE_KEYS = ('Youtube', 'TikTok', 'Instagram', 'Twitter')
+
+# Characters invalid in Drive/desktop folder names, each mapped to '_'
+_INVALID_TRANS = str.maketrans({c: '_' for c in '<>:"/\\|?*'})
+
+# Quality preference -> yt-dlp format string
+_FORMAT_MAP = MappingProxyType({
+    'best': 'bestvideo+bestaudio/best',
+    '1080p': 'bestvideo[height<=1080]+bestaudio/best[height<=1080]',
+    '720p': 'bestvideo[height<=720]+bestaudio/best[height<=720]',
+    '480p': 'bestvideo[height<=480]+bestaudio/best[height<=480]',
+    'audio': 'bestaudio/best'
+})
+
+# Browser-like request headers; each download adds a User-Agent
+_BASE_HTTP_HEADERS = MappingProxyType({
+    'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8',
+    'Accept-Language': 'en-us,en;q=0.5',
+    'Sec-Fetch-Mode': 'navigate',
+})
+
+# Downloads per session before rotating user agent and connections
+_SESSION_DOWNLOADS = (10, 15)
+
+# Drive uploads run at once during a bulk download
+UPLOAD_WORKERS = 2
+# Finished bulk downloads that may wait for an uploader
+UPLOAD_QUEUE_SIZE = 2
+
+# Anti-detection delay bounds (seconds) before each bulk download
+_BULK_DELAY = (3, 15)
+
+# yt-dlp's disk cache, kept with the rest of OmniStream's state
+# ('cache' in the name lets yt-dlp's --rm-cache-dir clear it)
+YTDLP_CACHE_DIR = os.path.join(CACHE_DIR, 'yt-dlp-cache')
+
+# Range size for progressive (non-fragmented) downloads
+HTTP_CHUNK_SIZE = 10 * 1024 * 1024
+# Initial read buffer for downloads
+DOWNLOAD_BUFFER_SIZE = 1024 * 1024
+# Minimum seconds between progress callbacks for the same file
+PROGRESS_INTERVAL = 0.25
+
+# Run after conversion: write tags/chapters and the thumbnail into the file
+_EMBED_POSTPROCESSORS = (
+    {'key': 'FFmpegMetadata', 'add_metadata': True, 'add_chapters': True},
+    {'key': 'EmbedThumbnail', 'already_have_thumbnail': False},
+)
+
+# Options that don't change how a YoutubeDL instance behaves between calls:
+# hooks are bound to the same engine, and outtmpl is swapped in per call
+_POOL_KEY_EXCLUDE = frozenset({'outtmpl', 'progress_hooks', 'postprocessor_hooks'})
+
+
+def _url_video_id(url: str) -> Optional[str]:
+    """Video ID encoded in the URL itself, found without any network request"""
+    # Known platforms: try their extractor before scanning every extractor
+    match = _PLATFORM_RE.search(url)
+    if match:
+        ie = yt_dlp.extractor.get_info_extractor(_PLATFORM_IE_KEYS[match.lastindex - 1])
+        if ie.suitable(url):
+            return ie.get_temp_id(url)
+    for ie in yt_dlp.extractor.gen_extractor_classes():
+        if ie.suitable(url):
+            return ie.get_temp_id(url)
+    return None
+
+
+def _flat_videos(entries, listing_url: str = '', seen: Optional[set] = None):
+    """
+    (entry, listing_url) for each video entry of a flat playlist result
+    
+    A channel's root page comes back as one nested playlist per tab
+    (Videos, Shorts, Live...), so nested playlists are expanded and each
+    video is paired with the URL of the tab that listed it; a video listed
+    in more than one of them is yielded once.
+    """
+    if seen is None:
+        seen = set()
+    for entry in entries or ():
+        if not entry:
+            continue
+        if entry.get('_type') == 'playlist':
+            yield from _flat_videos(entry.get('entries'), entry.get('webpage_url') or listing_url, seen)
+        elif entry.get('url') or entry.get('webpage_url'):
+            video_id = entry.get('id')
+            if video_id:
+                if video_id in seen:
+                    continue
+                seen.add(video_id)
+            yield entry, listing_url
+
+
+def _may_be_short(entry: dict, listing_url: str) -> bool:
+    """
+    False only when a flat entry's data shows it isn't a Short
+    
+    A channel tab links every Short as /shorts/<id>, so there the URL
+    decides. Playlists link Shorts as watch?v= like any other video, so
+    there only a duration over SHORTS_MAX_DURATION rules one out.
+    Entries from other platforms are always kept.
+    """
+    if entry.get('ie_key') != 'Youtube':
+        return True
+    if _SHORTS_URL_RE.search(entry.get('url') or entry.get('webpage_url')):
+        return True
+    if _CHANNEL_LISTING_RE.search(listing_url):
+        return False
+    return (entry.get('duration') or 0) <= SHORTS_MAX_DURATION
+
+
+def _opts_key(opts: dict) -> tuple:
+    """Hashable signature of ydl_opts for pooling YoutubeDL instances"""
+    return tuple(sorted(
+        (k, repr(v)) for k, v in opts.items() if k not in _POOL_KEY_EXCLUDE
+    ))
 
 
 class YtDlpEngine:
     """Primary engine for video platforms with Shorts filtering"""
     
-    def __init__(self, output_path: str, progress_callback: Optional[Callable] = None, log_callback: Optional[Callable] = None, stealth_mode: bool = True, use_drive_api: bool = False, drive_folder_id: str = None):
+    def __init__(self, output_path: str, progress_callback: Optional[Callable] = None, log_callback: Optional[Callable] = None, stealth_mode: bool = True, use_drive_api: bool = False, drive_folder_id: str = None, max_workers: int = DEFAULT_WORKERS, concurrent_fragment_downloads: int = 4):
         self.output_path = output_path
+        # Output template for direct downloads; fixed for the engine's lifetime
+        self._outtmpl = os.path.join(os.fspath(output_path), '%(uploader)s', '%(title)s_%(id)s.%(ext)s')
         self.progress_callback = progress_callback
         self.log_callback = log_callback
+        # Playlist/channel entries are downloaded this many at a time
+        self.max_workers = max(1, max_workers)
+        # HLS/DASH fragments fetched in parallel within one video
+        self.concurrent_fragment_downloads = max(1, concurrent_fragment_downloads)
+        # Bulk workers share the progress callback
+        self._callback_lock = threading.Lock()
+        # Pending log messages and the lock held while delivering them
+        self._log_queue = queue.SimpleQueue()
+        self._log_lock = threading.Lock()
+        # Reused by _progress_hook (guarded by _callback_lock)
+        self._progress_payload = {'percentage': '', 'speed': '', 'eta': '', 'filename': ''}
+        # Per file being downloaded: [last delivery time, basename]
+        self._progress_files = {}
+        # Idle YoutubeDL instances by options signature. Reusing them keeps
+        # yt-dlp's HTTP session (and its TLS connections) alive across
+        # videos; an instance is only ever used by one thread at a time.
+        self._ydl_pool = {}
+        self._ydl_lock = threading.Lock()
+        # Bumped by close(); instances borrowed before then are closed on
+        # return instead of going back into the new pool
+        self._ydl_generation = 0
+        # Drive API downloads wait for upload in one temp dir per engine
+        # (see _shared_temp_dir)
+        self._temp_dir = None
+        self._temp_lock = threading.Lock()
+        # Video IDs found under output_path, and each folder's mtime and
+        # IDs from when it was last read (see _local_ids)
+        self._local_id_index = set()
+        self._local_dirs = {}
+        self._local_ids_stale = True
+        self._local_ids_lock = threading.Lock()
+        # User agent of the current session and downloads left before
+        # rotating to a fresh one (see _session_user_agent)
+        self._session_ua = None
+        self._session_left = 0
+        # yt-dlp options shared by every download; download() adds a user
+        # agent and its per-call filters on top
+        self._ydl_base = {
+            # Output template: Creator/Title_VideoID.ext
+            # This ensures: 1) Creator folders, 2) Original title, 3) Unique ID
+            'outtmpl': self._outtmpl,
+            'ignoreerrors': True,
+            'no_warnings': True,
+            'quiet': False,
+            'progress_hooks': [self._progress_hook],
+            'postprocessor_hooks': [self._postprocessor_hook],
+            'match_filter': self._skip_downloaded,
+            'geo_bypass': True,
+            'nocheckcertificate': True,
+            'socket_timeout': 30,
+            'retries': 3,
+            # Player JS data (signature/nsig solutions) survives restarts here
+            'cachedir': YTDLP_CACHE_DIR,
+            'fragment_retries': 3,
+        
+            # Throughput: parallel fragments for HLS/DASH, large ranged GETs
+            # for progressive formats, and a bigger read buffer
+            'concurrent_fragment_downloads': self.concurrent_fragment_downloads,
+            'http_chunk_size': HTTP_CHUNK_SIZE,
+            'buffersize': DOWNLOAD_BUFFER_SIZE,
+            'extract_flat': False,
+        
+            # No side files: metadata and thumbnail are embedded in the
+            # container instead (EmbedThumbnail deletes the fetched thumb)
+            'writeinfojson': False,  # Don't save .info.json
+            'writethumbnail': True,  # Temporary, for EmbedThumbnail only
+        
+            # FFmpeg Integration: Merge video+audio into single MP4
+            'format': 'bestvideo[ext=mp4]+bestaudio[ext=m4a]/bestvideo+bestaudio/best',
+            'merge_output_format': 'mp4',  # Force MP4 container
+            'postprocessors': [{
+                # Rewrap (stream copy, no re-encode) single-file fallbacks
+                # such as webm into MP4; merged downloads are MP4 already
+                'key': 'FFmpegVideoRemuxer',
+                'preferedformat': 'mp4',
+            }, *_EMBED_POSTPROCESSORS],
+        }
         self.stealth_mode = stealth_mode
-        self.ua = UserAgent()
+        # Cookie injection (Stealth): cookies.txt is looked for once, when
+        # the engine starts
+        self._cookie_file = 'cookies.txt' if stealth_mode and os.path.exists('cookies.txt') else None
+        if self._cookie_file:
+            self._ydl_base['cookiefile'] = self._cookie_file
         self.use_drive_api = use_drive_api
         # Use specific folder ID: https://drive.google.com/drive/folders/1DQDRFQtl7fkgyXoP-sqRENau2WCLJH18
         # STRICT ENFORCEMENT: Always fallback to this specific ID
@@ -41,10 +272,139 @@ class YtDlpEngine:
                 self.log(f"⚠️  Drive API initialization failed: {e}", "WARNING")
                 self.use_drive_api = False
         
+    @contextmanager
+    def _ydl(self, opts: dict):
+        """
+        Borrow a YoutubeDL built for `opts` from the pool (or create one)
+        
+        Args:
+            opts: yt-dlp options; only 'outtmpl' may differ between
+                  calls that share an instance
+        """
+        key = _opts_key(opts)
+        with self._ydl_lock:
+            generation = self._ydl_generation
+            idle = self._ydl_pool.get(key)
+            ydl = idle.pop() if idle else None
+        if ydl is None:
+            ydl = yt_dlp.YoutubeDL(opts)
+        elif 'outtmpl' in opts:
+            # Templates are looked up per download, so swapping is safe
+            ydl.params['outtmpl']['default'] = opts['outtmpl']
+        try:
+            yield ydl
+        finally:
+            with self._ydl_lock:
+                current = generation == self._ydl_generation
+                if current:
+                    self._ydl_pool.setdefault(key, []).append(ydl)
+            if not current:
+                try:
+                    ydl.close()
+                except Exception:
+                    pass
+    
+    def close(self):
+        """
+        Close pooled YoutubeDL instances (saves cookies, drops connections)
+        
+        Instances borrowed at the time are closed when they are returned.
+        """
+        with self._ydl_lock:
+            pooled = [ydl for idle in self._ydl_pool.values() for ydl in idle]
+            self._ydl_pool.clear()
+            self._ydl_generation += 1
+        for ydl in pooled:
+            try:
+                ydl.close()
+            except Exception:
+                pass
+    
+    def _session_user_agent(self) -> str:
+        """
+        User agent for the next download
+        
+        One user agent (and the pooled YoutubeDL sessions built with it) is
+        kept for a random 10-15 downloads, then the sessions are closed and
+        a new user agent is picked.
+        """
+        if self._session_left <= 0:
+            self.close()
+            self._session_ua = random_user_agent()
+            self._session_left = random.randint(*_SESSION_DOWNLOADS)
+        self._session_left -= 1
+        return self._session_ua
+    
+    def __del__(self):
+        try:
+            self.close()
+        except Exception:
+            pass
+        if getattr(self, '_temp_dir', None):
+            shutil.rmtree(self._temp_dir, ignore_errors=True)
+    
+    def _shared_temp_dir(self) -> str:
+        """
+        Temp directory Drive API downloads go to before upload
+        
+        Created on first use and shared by every download of this engine, so
+        a bulk run doesn't create and remove a directory per video. Uploads
+        delete only their own video's files (see _remove_temp_files); the
+        directory itself goes when the engine does, or at exit.
+        """
+        with self._temp_lock:
+            if self._temp_dir is None or not os.path.isdir(self._temp_dir):
+                self._temp_dir = tempfile.mkdtemp(prefix='omnistream_')
+                atexit.register(shutil.rmtree, self._temp_dir, True)
+            return self._temp_dir
+    
+    @staticmethod
+    def _remove_temp_files(temp_dir: str, video_id: Optional[str]):
+        """
+        Delete one video's files (final, partial and intermediate) from temp_dir
+        
+        Every file yt-dlp writes for a video is named from the
+        '%(title)s_%(id)s.%(ext)s' template, so they all contain "_<id>.".
+        """
+        if not video_id:
+            return
+        marker = f"_{video_id}."
+        try:
+            with os.scandir(temp_dir) as it:
+                for entry in it:
+                    if marker in entry.name:
+                        try:
+                            os.unlink(entry.path)
+                        except OSError:
+                            pass
+        except OSError:
+            pass
+    
     def log(self, message: str, level: str = "INFO"):
-        """Send log message to callback"""
-        if self.log_callback:
-            self.log_callback(message, level)
+        """
+        Send log message to callback
+        
+        Messages are queued; whichever thread finds the callback idle
+        delivers everything pending, in order. Other threads return at once
+        instead of waiting on the (possibly slow, GUI) callback.
+        """
+        if not self.log_callback:
+            return
+        self._log_queue.put((message, level))
+        while self._log_lock.acquire(blocking=False):
+            try:
+                while True:
+                    try:
+                        queued = self._log_queue.get_nowait()
+                    except queue.Empty:
+                        break
+                    self.log_callback(*queued)
+            finally:
+                self._log_lock.release()
+            # A message queued while we were delivering, whose sender
+            # couldn't take the lock, is ours to deliver
+            if self._log_queue.empty():
+                break
             
     def _normalize_shorts_url(self, url: str) -> str:
         """
@@ -56,26 +416,96 @@ class YtDlpEngine:
         # Let yt-dlp handle the URL natively
         return url
     
+    def _already_downloaded(self, video_id: str) -> bool:
+        """True if the video is in history or, for direct downloads, on disk"""
+        if get_history().is_downloaded(video_id):
+            return True
+        return not (self.use_drive_api and self.drive_api) and video_id in self._local_ids()
+    
+    def _local_ids(self) -> set:
+        """
+        IDs of videos with a file already under output_path
+        
+        Downloads are written to output_path/<uploader>/Title_ID.ext, so
+        only output_path and its direct subfolders are read, and only media
+        files whose name ends in an ID-shaped suffix count. The folders are
+        checked again after each download() call starts; one whose mtime is
+        unchanged (no file added or removed) isn't read again.
+        """
+        with self._local_ids_lock:
+            if not self._local_ids_stale:
+                return self._local_id_index
+            self._local_ids_stale = False
+            folders = [self.output_path]
+            try:
+                with os.scandir(self.output_path) as it:
+                    folders += [entry.path for entry in it if entry.is_dir(follow_symlinks=False)]
+            except OSError:
+                pass
+            dirs, ids = {}, set()
+            for folder in folders:
+                try:
+                    mtime = os.stat(folder).st_mtime_ns
+                except OSError:
+                    continue
+                cached = self._local_dirs.get(folder)
+                if cached is None or cached[0] != mtime:
+                    cached = (mtime, self._scan_ids(folder))
+                dirs[folder] = cached
+                ids |= cached[1]
+            self._local_dirs = dirs
+            self._local_id_index = ids
+            return ids
+    
+    @staticmethod
+    def _scan_ids(folder: str) -> set:
+        """Video IDs named by the media files directly in folder"""
+        ids = set()
+        try:
+            with os.scandir(folder) as it:
+                for entry in it:
+                    stem, ext = os.path.splitext(entry.name)
+                    if ext.lower() in _MEDIA_EXTS:
+                        match = _FILE_ID_RE.search(stem)
+                        if match and entry.is_file():
+                            ids.add(match.group(1))
+        except OSError:
+            pass
+        return ids
+    
+    def _skip_downloaded(self, info, incomplete):
+        """
+        yt-dlp match_filter: Returns a string to SKIP videos already downloaded
+        
+        yt-dlp also calls this for flat playlist entries before extracting
+        them, so known videos cost one indexed lookup instead of a full
+        extraction and format selection.
+        """
+        video_id = info.get('id')
+        if video_id and self._already_downloaded(video_id):
+            self.log(f"⏭️  Skipping: Already downloaded (ID: {video_id})", "WARNING")
+            return f"Skipping: Already downloaded (ID: {video_id})"
+        return None
+    
     def _is_short(self, info, incomplete):
         """
         Custom Filter: Returns None to DOWNLOAD, or a string to SKIP.
-        Logic: Keeps video if URL has '/shorts/' OR if it is Vertical (Height > Width).
+        Logic: Keeps video if it is Vertical (Height > Width) OR if URL has '/shorts/'.
         """
-        url = info.get('webpage_url', '')
-        original_url = info.get('original_url', '')
+        # 1. Shape Signal: It is a Vertical Video (9:16 aspect ratio)
+        # Checked first: two integer compares settle almost every
+        # TikTok/Instagram entry, and catches Shorts that YouTube might
+        # serve with a standard /watch?v= URL
         width = info.get('width')
         height = info.get('height')
+        if width and height and height > width:
+            return None  # Keep it (It's vertical, likely a Short/TikTok)
 
-        # 1. Strong Signal: The URL explicitly says "shorts"
-        if '/shorts/' in url or '/shorts/' in original_url:
+        # 2. Strong Signal: The URL explicitly says "shorts"
+        # (original_url is only scanned when webpage_url doesn't match)
+        if '/shorts/' in (info.get('webpage_url') or '') or '/shorts/' in (info.get('original_url') or ''):
             return None  # Keep it (It's definitely a Short)
 
-        # 2. Shape Signal: It is a Vertical Video (9:16 aspect ratio)
-        # This catches Shorts that YouTube might serve with a standard /watch?v= URL
-        if width and height:
-            if height > width:
-                return None  # Keep it (It's vertical, likely a Short/TikTok)
-
         # 3. Fallback: If neither, it's a standard horizontal video -> Skip it.
         return "Skipping: Content is not a Short (Horizontal/Standard Format)"
     
@@ -97,56 +527,25 @@ class YtDlpEngine:
         
         self.log(f"Starting yt-dlp download: {url}")
         
-        # Get video info first to check if already downloaded
-        try:
-            with yt_dlp.YoutubeDL({'quiet': True, 'no_warnings': True}) as ydl:
-                info = ydl.extract_info(url, download=False)
-                video_id = info.get('id')
-                
-                # Check duplicate detection database
-                if video_id and get_history().is_downloaded(video_id):
-                    self.log(f"⏭️  Skipping: Already downloaded (ID: {video_id})", "WARNING")
-                    return True, f"Video already in history: {info.get('title', 'Unknown')}"
-        except Exception as e:
-            self.log(f"Could not pre-check video info: {e}", "WARNING")
+        bulk = self._is_bulk_operation(url)
+        
+        # Files may have been added or deleted since the last URL
+        self._local_ids_stale = True
         
-        # Check for cookies.txt
-        cookie_file = 'cookies.txt' if os.path.exists('cookies.txt') else None
-        if cookie_file and self.stealth_mode:
+        # Check duplicate detection database. The ID usually comes straight
+        # from the URL, so known videos are skipped without extracting;
+        # bulk URLs are checked per entry instead.
+        video_id = None if bulk else _url_video_id(url)
+        if video_id and self._already_downloaded(video_id):
+            self.log(f"⏭️  Skipping: Already downloaded (ID: {video_id})", "WARNING")
+            return True, f"Video already in history (ID: {video_id})"
+        
+        if self._cookie_file:
             self.log("Using cookies.txt for authentication")
         
-        # Base Options with FFmpeg Integration
-        ydl_opts = {
-            # Output template: Creator/Title_VideoID.ext
-            # This ensures: 1) Creator folders, 2) Original title, 3) Unique ID
-            'outtmpl': os.path.join(self.output_path, '%(uploader)s/%(title)s_%(id)s.%(ext)s'),
-            'ignoreerrors': True,
-            'no_warnings': True,
-            'quiet': False,
-            'progress_hooks': [self._progress_hook],
-            'postprocessor_hooks': [self._postprocessor_hook],
-            'geo_bypass': True,
-            'nocheckcertificate': True,
-            'extract_flat': False,
-            
-            # DISABLED: Don't save extra files
-            'writeinfojson': False,  # Don't save .info.json
-            'writethumbnail': False,  # Don't save thumbnails
-            
-            # FFmpeg Integration: Merge video+audio into single MP4
-            'format': 'bestvideo[ext=mp4]+bestaudio[ext=m4a]/bestvideo+bestaudio/best',
-            'merge_output_format': 'mp4',  # Force MP4 container
-            'postprocessors': [{
-                'key': 'FFmpegVideoConvertor',
-                'preferedformat': 'mp4',  # Convert to MP4 if needed
-            }],
-            
-            'http_headers': {
-                'User-Agent': self.ua.random,
-                'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8',
-                'Accept-Language': 'en-us,en;q=0.5',
-                'Sec-Fetch-Mode': 'navigate',
-            }
+        # Base Options with FFmpeg Integration, plus the session's user agent
+        ydl_opts = self._ydl_base | {
+            'http_headers': _BASE_HTTP_HEADERS | {'User-Agent': self._session_user_agent()},
         }
         
         # Add max downloads limit if specified
@@ -162,10 +561,6 @@ class YtDlpEngine:
             ydl_opts['datebefore'] = date_before.replace('-', '') # YYYYMMDD
             self.log(f"📅 Filter: Before {date_before}")
         
-        # Cookie injection (Stealth)
-        if cookie_file and self.stealth_mode:
-            ydl_opts['cookiefile'] = cookie_file
-        
         # --- SHORTS MODE LOGIC ---
         if mode == "shorts_only":
             self.log("Mode: Shorts Only (filtering vertical content)")
@@ -187,40 +582,271 @@ class YtDlpEngine:
                 'key': 'FFmpegExtractAudio',
                 'preferredcodec': 'mp3',
                 'preferredquality': '192',
-            }]
+            }, *_EMBED_POSTPROCESSORS]
+        
+        # Single videos: run the extractor once up front. Its result answers
+        # the history check when the URL didn't carry an ID, and the
+        # download reuses it instead of extracting a second time.
+        info = None
+        if not bulk:
+            info = self._extract_info(url, ydl_opts)
+            if info and not video_id and info.get('id') and self._already_downloaded(info['id']):
+                self.log(f"⏭️  Skipping: Already downloaded (ID: {info['id']})", "WARNING")
+                return True, f"Video already in history: {info.get('title', 'Unknown')}"
+        
+        if bulk:
+            # Workers take their own delays, so enumeration starts now
+            return self._download_bulk(url, ydl_opts, shorts_only=mode == "shorts_only")
+        
+        return self._download_one(url, ydl_opts, info)
+    
+    def _extract_info(self, url: str, ydl_opts: dict) -> Optional[dict]:
+        """
+        Run the extractor without format selection or download
+        
+        Returns:
+            Unprocessed info dict, or None if extraction failed
+        """
+        started = time.monotonic()
+        try:
+            with self._ydl(ydl_opts) as ydl:
+                info = ydl.extract_info(url, download=False, process=False)
+        except Exception as e:
+            self.log(f"Could not pre-check video info: {e}", "WARNING")
+            return None
+        self.log(f"🔎 Extracted video info in {time.monotonic() - started:.2f}s")
+        return info
+    
+    def _download_bulk(self, url: str, ydl_opts: dict, shorts_only: bool = False) -> Tuple[bool, str]:
+        """
+        Enumerate a playlist/channel with a flat extraction, then download
+        its entries on up to max_workers threads (one YoutubeDL each)
+        
+        Args:
+            url: Playlist or channel URL
+            ydl_opts: Options each entry is downloaded with
+            shorts_only: Drop YouTube entries known not to be Shorts
+            
+        Returns:
+            (success: bool, message: str) summarising all entries
+        """
+        flat_opts = {**ydl_opts, 'extract_flat': 'in_playlist', 'skip_download': True, 'quiet': True}
+        try:
+            with self._ydl(flat_opts) as ydl:
+                info = ydl.extract_info(url, download=False)
+        except Exception as e:
+            self.log(f"✗ yt-dlp error: {e}", "ERROR")
+            return False, f"Download failed: {e}"
+        enumerated = time.monotonic()
         
-        # Anti-detection delay for bulk operations
-        if self._is_bulk_operation(url):
-            delay = random.uniform(5, 15)
-            self.log(f"Anti-detection delay: {delay:.2f}s")
-            time.sleep(delay)
+        # Entries already in history were dropped by the match_filter
+        # during the flat extraction
+        # Shorts mode: flat entries carry no width/height, but their URL or
+        # duration can rule a video out, so it's dropped here without ever
+        # being extracted (see _may_be_short)
+        info = info or {}
+        entries = [
+            entry for entry, listing_url in _flat_videos(info.get('entries'), info.get('webpage_url') or url)
+            if not shorts_only or _may_be_short(entry, listing_url)
+        ]
         
+        if not entries:
+            return False, "No new videos found"
+        
+        uploads = None
+        if self.use_drive_api and self.drive_api:
+            # Finished downloads go to uploader threads, so the next
+            # video downloads while earlier ones upload; the bound caps
+            # how many finished files wait in temp storage
+            uploads = queue.Queue(maxsize=UPLOAD_QUEUE_SIZE)
+            uploaded = []
+            
+            def uploader():
+                while True:
+                    # Take every download that is already waiting, so their
+                    # folders resolve in one batch call. Sentinels only
+                    # follow the last download, and each thread stops at
+                    # the first one it takes.
+                    batch = [uploads.get()]
+                    while batch[-1] is not None:
+                        try:
+                            batch.append(uploads.get_nowait())
+                        except queue.Empty:
+                            break
+                    items = [item for item in batch if item is not None]
+                    if items:
+                        self._prepare_drive_folders([info for info, _ in items])
+                    for item in items:
+                        try:
+                            ok, _ = self._upload_to_drive(*item)
+                        except Exception as e:
+                            self.log(f"✗ Drive upload error: {e}", "ERROR")
+                            ok = False
+                        uploaded.append(ok)
+                    if batch[-1] is None:
+                        return
+            
+            upload_threads = [
+                threading.Thread(target=uploader, name=f'omnistream-upload-{i}')
+                for i in range(UPLOAD_WORKERS)
+            ]
+            for thread in upload_threads:
+                thread.start()
+        
+        self.log(f"📋 Downloading {len(entries)} videos with {self.max_workers} workers")
+        
+        def hand_off(info, temp_dir):
+            uploads.put((info, temp_dir))
+        
+        idle = threading.local()
+        
+        def worker(entry):
+            # Anti-detection delay per video; workers sleep independently,
+            # so the waits overlap instead of gating the whole batch. Each
+            # delay runs from the end of the worker's previous video, and a
+            # worker's first from the end of enumeration, so that one
+            # overlaps the uploader setup above.
+            deadline = getattr(idle, 'since', enumerated) + random.uniform(*_BULK_DELAY)
+            remaining = deadline - time.monotonic()
+            if remaining > 0:
+                time.sleep(remaining)
+            # The flat entry already names its extractor, so yt-dlp resolves
+            # it without matching the URL against every extractor again
+            entry_url = entry.get('url') or entry.get('webpage_url')
+            try:
+                return self._download_one(entry_url, ydl_opts, info=dict(entry),
+                                          on_downloaded=hand_off if uploads is not None else None)
+            finally:
+                idle.since = time.monotonic()
+        
+        succeeded = skipped = 0
+        try:
+            with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+                futures = [pool.submit(worker, entry) for entry in entries]
+                for future in as_completed(futures):
+                    try:
+                        ok, message = future.result()
+                    except Exception as e:
+                        self.log(f"✗ Worker error: {e}", "ERROR")
+                        ok, message = False, ''
+                    if ok and message.startswith(SKIPPED):
+                        skipped += 1
+                    else:
+                        succeeded += ok
+        finally:
+            if uploads is not None:
+                # Let queued uploads finish; a video only counts once it's on Drive
+                for thread in upload_threads:
+                    uploads.put(None)
+                for thread in upload_threads:
+                    thread.join()
+                succeeded = sum(uploaded)
+        
+        total = len(entries) - skipped
+        failed = total - succeeded
+        message = f"Downloaded {succeeded}/{total} videos"
+        if failed:
+            message += f" ({failed} failed)"
+        if skipped:
+            message += f", {skipped} skipped"
+        return succeeded > 0 or failed == 0, message
+    
+    def _drive_folder_names(self, info: dict) -> Tuple[str, str]:
+        """Platform and creator Drive folder names a download is uploaded to"""
+        platform = self._detect_platform(info.get('webpage_url', ''))
+        # Get creator name with better fallbacks
+        creator = info.get('uploader') or info.get('channel') or info.get('uploader_id') or 'Unknown_Creator'
+        # Sanitize creator name (remove invalid chars)
+        return platform, self._sanitize_folder_name(creator)
+    
+    def _prepare_drive_folders(self, infos: list):
+        """
+        Resolve the platform/creator Drive folders for finished downloads
+        
+        Lookups (and creation of missing folders) go out as Drive batch
+        calls; the results land in the Drive API's folder cache, so each
+        upload's find_or_create_folder() is answered without a round-trip.
+        Only downloads that passed the filters and completed get here, so
+        no folder is created for a video that is never uploaded.
+        
+        Args:
+            infos: Processed info dicts about to be uploaded
+        """
+        creators_by_platform = {}
+        for info in infos:
+            platform, creator = self._drive_folder_names(info)
+            creators_by_platform.setdefault(platform, set()).add(creator)
+        
+        platforms = list(creators_by_platform)
+        try:
+            platform_ids = self.drive_api.find_or_create_folders([[p] for p in platforms], self.drive_folder_id)
+            for platform, platform_id in zip(platforms, platform_ids):
+                if platform_id:
+                    creators = sorted(creators_by_platform[platform])
+                    self.drive_api.find_or_create_folders([[c] for c in creators], platform_id)
+        except Exception as e:
+            self.log(f"⚠️  Could not pre-resolve Drive folders: {e}", "WARNING")
+    
+    def _download_one(self, url: str, ydl_opts: dict, info: Optional[dict] = None, on_downloaded: Optional[Callable] = None) -> Tuple[bool, str]:
+        """
+        Download (and, in Drive API mode, upload) one URL
+        
+        Args:
+            url: URL to download
+            ydl_opts: yt-dlp options (not modified)
+            info: Unprocessed extraction (or flat playlist entry) of url
+                  to reuse, if already done
+            on_downloaded: Drive API mode only: called with (info, temp_dir)
+                           to hand off the upload instead of uploading here
+            
+        Returns:
+            (success: bool, message: str)
+        """
+        temp_dir = None
+        # For temp file cleanup; info is replaced once processed
+        video_id = (info or {}).get('id')
         # Execute download
         try:
             # For Drive API mode: download to temp first
             if self.use_drive_api and self.drive_api:
-                temp_dir = tempfile.mkdtemp(prefix='omnistream_')
-                ydl_opts['outtmpl'] = os.path.join(temp_dir, '%(title)s_%(id)s.%(ext)s')
+                temp_dir = self._shared_temp_dir()
+                ydl_opts = {**ydl_opts, 'outtmpl': os.path.join(temp_dir, '%(title)s_%(id)s.%(ext)s')}
                 self.log(f"📥 Downloading to temp: {temp_dir}")
             else:
                 # Direct download to final destination
                 self.log(f"📥 Downloading directly to: {self.output_path}")
             
-            with yt_dlp.YoutubeDL(ydl_opts) as ydl:
-                info = ydl.extract_info(url, download=True)
+            with self._ydl(ydl_opts) as ydl:
+                if info is not None:
+                    # Resolves a flat entry, then selects formats and downloads
+                    info = ydl.process_ie_result(info, download=True)
+                else:
+                    info = ydl.extract_info(url, download=True)
+                
+                if info and not info.get('requested_downloads'):
+                    # The match_filter rejected it (e.g. listed in two tabs,
+                    # or recorded by another run meanwhile): nothing was
+                    # downloaded, so history and Drive are left alone
+                    return True, f"{SKIPPED} {info.get('title', 'Unknown')}"
                 
                 if info:
                     title = info.get('title', 'Unknown')
                     
                     # Record in download history database
                     try:
+                        file_path = self._final_path(info)
+                        try:
+                            # One stat; yt-dlp's estimate if the file is gone
+                            file_size = os.stat(file_path).st_size
+                        except (TypeError, OSError):
+                            file_size = info.get('filesize') or info.get('filesize_approx') or 0
                         video_info_db = {
                             'video_id': info.get('id'),
                             'title': info.get('title'),
                             'channel_name': info.get('uploader') or info.get('channel'),
                             'url': info.get('webpage_url') or url,
-                            'file_path': info.get('_filename'),
-                            'file_size': os.path.getsize(info.get('_filename')) if info.get('_filename') and os.path.exists(info.get('_filename')) else 0,
+                            'file_path': file_path,
+                            'file_size': file_size,
                             'platform': 'YouTube' if 'youtube' in url else 'Unknown',
                             'format': info.get('ext'),
                             'duration': info.get('duration')
@@ -231,57 +857,79 @@ class YtDlpEngine:
                     
                     # If using Drive API, upload and cleanup
                     if self.use_drive_api and self.drive_api:
+                        if on_downloaded:
+                            on_downloaded(info, temp_dir)
+                            return True, f"Downloaded: {title}"
                         return self._upload_to_drive(info, temp_dir)
                     else:
                         self.log(f"✓ Successfully downloaded: {title}", "SUCCESS")
                         return True, f"Downloaded: {title}"
                 else:
+                    if temp_dir:
+                        self._remove_temp_files(temp_dir, video_id)
                     return False, "Failed to extract video information"
                     
         except Exception as e:
+            # Don't leave partial downloads behind in temp
+            if temp_dir:
+                self._remove_temp_files(temp_dir, video_id)
             error_msg = str(e)
             self.log(f"✗ yt-dlp error: {error_msg}", "ERROR")
             return False, f"Download failed: {error_msg}"
     
+    @staticmethod
+    def _final_path(info: dict) -> Optional[str]:
+        """
+        Path of the file a processed download produced
+        
+        yt-dlp records it on the entries of 'requested_downloads' ('filepath'
+        is set after merging/conversion), not on the returned info itself.
+        """
+        download = (info.get('requested_downloads') or [info])[-1]
+        return download.get('filepath') or download.get('_filename')
+    
     def _get_format_string(self, quality: str, mode: str) -> str:
         """Convert quality preference to yt-dlp format string"""
         if mode == 'audio':
-            return 'bestaudio/best'
-        
-        format_map = {
-            'best': 'bestvideo+bestaudio/best',
-            '1080p': 'bestvideo[height<=1080]+bestaudio/best[height<=1080]',
-            '720p': 'bestvideo[height<=720]+bestaudio/best[height<=720]',
-            '480p': 'bestvideo[height<=480]+bestaudio/best[height<=480]',
-            'audio': 'bestaudio/best'
-        }
-        return format_map.get(quality, format_map['best'])
+            return _FORMAT_MAP['audio']
+        return _FORMAT_MAP.get(quality, _FORMAT_MAP['best'])
     
     def _is_bulk_operation(self, url: str) -> bool:
         """Detect if URL is a channel/playlist (bulk operation)"""
-        bulk_indicators = ['playlist', 'channel', '/c/', '/@', '/user/']
-        return any(indicator in url.lower() for indicator in bulk_indicators)
+        return _BULK_RE.search(url) is not None
     
     def _progress_hook(self, d):
         """Progress callback for UI updates"""
-        if d['status'] == 'downloading':
-            try:
+        status = d.get('status')
+        if status == 'downloading':
+            if not self.progress_callback:
+                return
+            with self._callback_lock:
+                # yt-dlp calls this for every chunk read; a file's ticks
+                # closer than PROGRESS_INTERVAL are dropped unless they
+                # complete it. Bulk workers download several files at once,
+                # so each file is timed on its own.
+                now = time.monotonic()
+                filename = d.get('filename')
                 percentage = d.get('_percent_str', '0%').strip()
-                speed = d.get('_speed_str', 'N/A').strip()
-                eta = d.get('_eta_str', 'N/A').strip()
-                filename = d.get('filename', 'Unknown')
-                
-                if self.progress_callback:
-                    self.progress_callback({
-                        'percentage': percentage,
-                        'speed': speed,
-                        'eta': eta,
-                        'filename': os.path.basename(filename)
-                    })
-            except:
-                pass
+                seen = self._progress_files.get(filename)
+                if seen is None:
+                    seen = self._progress_files[filename] = [now, os.path.basename(filename) if filename else 'Unknown']
+                elif now - seen[0] < PROGRESS_INTERVAL and percentage != '100%':
+                    return
+                seen[0] = now
+                # One payload dict is reused for every tick (callers read it
+                # synchronously)
+                payload = self._progress_payload
+                payload['percentage'] = percentage
+                payload['speed'] = d.get('_speed_str', 'N/A').strip()
+                payload['eta'] = d.get('_eta_str', 'N/A').strip()
+                payload['filename'] = seen[1]
+                self.progress_callback(payload)
         
-        elif d['status'] == 'finished':
+        elif status == 'finished':
+            with self._callback_lock:
+                self._progress_files.pop(d.get('filename'), None)
             self.log(f"Download finished, processing file...")
     
     def _postprocessor_hook(self, d):
@@ -298,20 +946,29 @@ class YtDlpEngine:
             video_id = info.get('id', '')
             ext = info.get('ext', 'mp4')
             
-            # Find downloaded file
-            filename = f"{title}_{video_id}.{ext}"
-            file_path = os.path.join(temp_dir, filename)
+            # Find downloaded file: yt-dlp reports where it ended up, the
+            # name guess is for info without that
+            file_path = self._final_path(info) or os.path.join(temp_dir, f"{title}_{video_id}.{ext}")
+            filename = os.path.basename(file_path)
             
-            # Find actual file if name doesn't match
-            if not os.path.exists(file_path):
-                files = [f for f in os.listdir(temp_dir) if f.endswith(f'.{ext}')]
-                if files:
-                    file_path = os.path.join(temp_dir, files[0])
-                    filename = files[0]
+            # Find actual file if name doesn't match (scandir stops at the
+            # first hit and reuses the directory read for the file check).
+            # Other videos share temp_dir, so only this video's names count.
+            found = os.path.isfile(file_path)
+            if not found:
+                suffix = f'.{ext}'
+                marker = f'_{video_id}.'
+                with os.scandir(temp_dir) as it:
+                    for entry in it:
+                        if marker in entry.name and entry.name.endswith(suffix) and entry.is_file():
+                            file_path = entry.path
+                            filename = entry.name
+                            found = True
+                            break
             
-            if not os.path.exists(file_path):
+            if not found:
                 self.log(f"✗ Downloaded file not found: {filename}", "ERROR")
-                shutil.rmtree(temp_dir, ignore_errors=True)
+                self._remove_temp_files(temp_dir, video_id)
                 return False, "File not found after download"
             
             self.log(f"📤 Uploading to Google Drive...")
@@ -319,26 +976,20 @@ class YtDlpEngine:
             # Use the configured folder ID directly (no navigation needed)
             base_folder_id = self.drive_folder_id
             
-            # Detect platform from URL
-            platform = self._detect_platform(info.get('webpage_url', ''))
+            platform, creator = self._drive_folder_names(info)
             
             # Create platform folder inside base folder
             platform_folder_id = self.drive_api.find_or_create_folder(base_folder_id, platform)
             if not platform_folder_id:
                 self.log(f"✗ Failed to create platform folder: {platform}", "ERROR")
-                shutil.rmtree(temp_dir, ignore_errors=True)
+                self._remove_temp_files(temp_dir, video_id)
                 return False, "Failed to create platform folder"
             
-            # Get creator name with better fallbacks
-            creator = info.get('uploader') or info.get('channel') or info.get('uploader_id') or 'Unknown_Creator'
-            # Sanitize creator name (remove invalid chars)
-            creator = self._sanitize_folder_name(creator)
-            
             # Create creator folder
             creator_folder_id = self.drive_api.find_or_create_folder(platform_folder_id, creator)
             if not creator_folder_id:
                 self.log(f"✗ Failed to create creator folder: {creator}", "ERROR")
-                shutil.rmtree(temp_dir, ignore_errors=True)
+                self._remove_temp_files(temp_dir, video_id)
                 return False, "Failed to create creator folder"
             
             # Upload file
@@ -348,44 +999,33 @@ class YtDlpEngine:
                 self.log(f"✓ Uploaded to Drive: {result['name']}", "SUCCESS")
                 self.log(f"🔗 View: {result.get('webViewLink', 'N/A')}")
                 
-                # Cleanup temp directory
-                shutil.rmtree(temp_dir, ignore_errors=True)
+                # Cleanup this video's temp files
+                self._remove_temp_files(temp_dir, video_id)
                 self.log("🗑️  Temp files cleaned up")
                 
                 return True, f"Uploaded to Drive: {title}"
             else:
                 self.log("✗ Upload failed", "ERROR")
-                shutil.rmtree(temp_dir, ignore_errors=True)
+                self._remove_temp_files(temp_dir, video_id)
                 return False, "Upload to Drive failed"
         
         except Exception as e:
             self.log(f"✗ Drive upload error: {str(e)}", "ERROR")
-            if os.path.exists(temp_dir):
-                shutil.rmtree(temp_dir, ignore_errors=True)
+            self._remove_temp_files(temp_dir, info.get('id'))
             return False, f"Upload error: {str(e)}"
     
     def _detect_platform(self, url: str) -> str:
         """Detect platform from URL"""
-        url_lower = url.lower()
-        if 'youtube.com' in url_lower or 'youtu.be' in url_lower:
-            return 'YouTube'
-        elif 'tiktok.com' in url_lower:
-            return 'TikTok'
-        elif 'instagram.com' in url_lower:
-            return 'Instagram'
-        elif 'twitter.com' in url_lower or 'x.com' in url_lower:
-            return 'Twitter'
-        else:
-            from urllib.parse import urlparse
-            domain = urlparse(url).netloc.replace('www.', '')
-            return f"Generic_Sites/{domain}"
+        match = _PLATFORM_RE.search(url)
+        if match:
+            return _PLATFORMS[match.lastindex - 1]
+        domain = urlparse(url).netloc.replace('www.', '')
+        return f"Generic_Sites/{domain}"
     
     def _sanitize_folder_name(self, name: str) -> str:
         """Remove invalid characters from folder name"""
-        # Remove characters that are invalid in folder names
-        invalid_chars = '<>:"/\\|?*'
-        for char in invalid_chars:
-            name = name.replace(char, '_')
+        # Remove characters that are invalid in folder names (one pass)
+        name = name.translate(_INVALID_TRANS)
         # Remove leading/trailing spaces and dots
         name = name.strip('. ')
         # Limit length